@@ -17,9 +17,8 @@ info, and have to specify experiments(`experiment_id`) to submit
 experiment-granularity info.
 """
 
-import json
 import argparse
-from utils import loadJSON, getJSON, postJSON, setJSONfname
+from utils import loadJSON, getJSON, postJSON, setJSONfname, dumpJSON
 
 __author__ = 'T.Inoue'
 __credits__ = 'Copyright (c) 2019 RIST'
@@ -68,6 +67,18 @@ def my_parser():
                         type=str,
                         help='Load base JSON from local file', nargs='?',
                         default=None, const='')
+    parser.add_argument('--compact',
+                        action='store_true',
+                        help='write compact JSON for machine use.',
+                        default=False)
+    parser.add_argument('--no-cache',
+                        dest='use_cache', action='store_false',
+                        help='do not use local response cache.',
+                        default=True)
+    parser.add_argument('--refresh',
+                        action='store_true',
+                        help='ignore cached data and download again.',
+                        default=False)
     return parser
 
 
@@ -78,26 +89,45 @@ def addExperiment(inData, experiment):
     - add `experiment` to subject as DRS,
     - remove identifier.
 
-    Returns deepcopy()_ed data, given `inData` is preserved.
+    Returns new data, given `inData` is preserved.
+
+    Only the changed paths (`subjects[0]` and `titles`) are copied, all
+    other items (`creators`, `relatedIdentifiers`, etc.) are shared with
+    `inData`.  Do not modify them in place, or use deepcopy() on the
+    result if you need to.
     """
 
-    from copy import deepcopy
-    data = deepcopy(inData)
+    data = dict(inData)
+
+    subjects = list(data['subjects'])
+    subjects[0] = dict(subjects[0])
+    subjects[0]['subject'] += '.' + experiment
+    data['subjects'] = subjects
 
-    data['subjects'][0]['subject'] += '.' + experiment
-    data['titles'][0] += ' ' + experiment
+    titles = list(data['titles'])
+    titles[0] += ' ' + experiment
+    data['titles'] = titles
 
     # delete identifier
-    if 'identifier' in data:
-        del data['identifier']
+    data.pop('identifier', None)
 
     return data
 
 
-def main():
+def expandExperiments(inData, experiments):
+    """
+    Generate (experiment, data) for each of `experiments`.
+
+    See addExperiment() for sharing of unchanged items.
+    """
+    for exp in experiments:
+        yield exp, addExperiment(inData, exp)
+
+
+def main(argv=None):
 
     parser = my_parser()
-    a = parser.parse_args()
+    a = parser.parse_args(argv)
 
     if (a.verbose):
         print('Configuration:')
@@ -116,7 +146,8 @@ def main():
 
     if (a.loadfile is None):
         base = getJSON(source_id=a.model, activity_id=a.mip,
-                       institution_id=a.inst)
+                       institution_id=a.inst,
+                       use_cache=a.use_cache, refresh=a.refresh)
     else:
         if (a.verbose):
             print('file:', a.loadfile)
@@ -132,8 +163,7 @@ def main():
         print('base title:', base_title)
         print('base subject:', base_subject)
 
-    for exp in a.experiments:
-        data = addExperiment(base, exp)     # base is preserved.
+    for exp, data in expandExperiments(base, a.experiments):  # base is preserved.
         data_title = data['titles'][0]
         data_subject = data['subjects'][0]['subject']
         if (a.verbose):
@@ -141,9 +171,8 @@ def main():
             print('data subject:', data_subject)
         # print(data)
         fname = setJSONfname(a.model, a.mip, a.inst, exp)
-        with open(fname, 'w') as f:
-            print('Saving base data to:', fname)
-            json.dump(data, f, indent=2)
+        print('Saving base data to:', fname)
+        dumpJSON(data, fname, compact=a.compact)
     print('Done.')
 
     return 0
@@ -7,15 +7,19 @@ Add reference to CMIP6 Citation info JSON file.
 ---
 This script reads in JSON file, add given reference info, write back to the same file.
 
+Many references (DOIs) can be given at once, and many records can be
+given by repeating -l (file, directory or glob pattern) or -e.  Records
+are written only when some reference is actually added, and a summary
+of added/skipped references per record is printed.
+
 Use getJSON.py to get original JSON file.
 
 Use postJSON.py to check/post created JSON file.
 
 """
 
-import json
 import argparse
-from utils import loadJSON, getJSON, postJSON, setJSONfname
+from utils import loadJSON, getJSON, postJSON, setJSONfname, dumpJSON, expandFiles
 __author__ = 'T.Inoue'
 __credits__ = 'Copyright (c) 2019 RIST'
 __version__ = 'v20190626'
@@ -56,98 +60,163 @@ def my_parser():
                         help='MIP(activity_id)',
                         default=mip)
     parser.add_argument('-e', '--experiment',
-                        metavar='exp', type=str,
-                        help='experiment to submit',
+                        metavar='exp', type=str, action='append',
+                        help='experiment to submit, may be repeated',
                         default=None)
     parser.add_argument('-l', '--loadfile',
-                        type=str,
-                        help='Load base JSON from local file', nargs='?',
+                        type=str, action='append',
+                        help='Load base JSON from local file, '
+                        'may be repeated', nargs='?',
                         default=None, const='')
-    parser.add_argument('reference',
-                        type=str,
+    parser.add_argument('--compact',
+                        action='store_true',
+                        help='write compact JSON for machine use.',
+                        default=False)
+    parser.add_argument('--no-cache',
+                        dest='use_cache', action='store_false',
+                        help='do not use local response cache.',
+                        default=True)
+    parser.add_argument('--refresh',
+                        action='store_true',
+                        help='ignore cached data and download again.',
+                        default=False)
+    parser.add_argument('references',
+                        metavar='reference', type=str, nargs='+',
                         help='reference(DOI)')
 
     return parser
 
 
-def addReference(inData, reference):
+def referenceIndex(data):
     """
+    Returns set of existing `References` identifiers of `data`.
     """
+    return {x['relatedIdentifier'] for x in data['relatedIdentifiers']
+            if x['relationType'] == 'References'}
 
-    from copy import deepcopy
-    data = deepcopy(inData)
 
-    existing_refs = [x for x in data['relatedIdentifiers'] if x['relationType']=='References']
-    ref_list = [ x['relatedIdentifier'] for x in existing_refs]
+def addReferences(inData, references, index=None):
+    """
+    Add `references` (DOIs) not yet in `inData`.
+
+    `index` is the set given by referenceIndex(), made from `inData` if
+    omitted.
 
-    if ( reference not in ref_list):
+    Returns tuple of (data, added, skipped), where `data` is None if
+    nothing is added.  Given `inData` is preserved; only the
+    `relatedIdentifiers` list is copied, other items are shared.
+    """
+    if index is None:
+        index = referenceIndex(inData)
+    index = set(index)
+
+    added = []
+    skipped = []
+    for reference in references:
+        if reference in index:
+            skipped.append(reference)
+        else:
+            index.add(reference)
+            added.append(reference)
+    if not added:
+        return None, added, skipped
+
+    data = dict(inData)
+    data['relatedIdentifiers'] = list(inData['relatedIdentifiers'])
+    for reference in added:
+        r = {"relatedIdentifier": reference,
+             "relatedIdentifierType": 'DOI',
+             "relationType": 'References'}
+        data['relatedIdentifiers'].append(r)
+    return data, added, skipped
+
+
+def addReference(inData, reference):
+    """
+    Add one `reference`, see addReferences().
+
+    Returns new data, or None if `reference` already exists.
+    """
+
+    data, added, skipped = addReferences(inData, [reference])
+
+    if added:
         print(reference, 'is NOT in existing references, adding it.')
     else:
         print(reference, 'is in existing references, do Noting.')
-        return None # temporary.
-
-    r = {"relatedIdentifier": reference,
-         "relatedIdentifierType": 'DOI',
-         "relationType": 'References'}
-
-    data['relatedIdentifiers'].append(r)
     return data
 
 
-def main():
+def main(argv=None):
 
     parser = my_parser()
-    a = parser.parse_args()
+    a = parser.parse_args(argv)
+
+    experiments = a.experiment or [None]
 
     if (a.verbose):
         print('Configuration:')
         # print('  dopost:', a.dopost)
-        print('  reference:', a.reference)
+        print('  references:', a.references)
         print('  model:', a.model)
         print('  mip:', a.mip)
-        print('  experiment:', a.experiment)
+        print('  experiments:', experiments)
         if (a.loadfile is None):
             print('  loadfile: not specified')
-        elif (a.loadfile==''):
-            print('  loadfile: name not given')
         else:
-            pritn('  loadfile:', a.loadfile)
-
-    
-    if (a.loadfile == ''):
-        a.loadfile = setJSONfname(source_id=a.model, activity_id=a.mip,
-                                  institution_id=a.inst, experiment_id=a.experiment)
-        # if (a.verbose):
-        #     print('loadfile: set as:', a.loadfile)
+            print('  loadfile:', a.loadfile)
 
+    # list of (source, fname to save)
+    records = []
     if (a.loadfile is None):
-        base = getJSON(source_id=a.model, activity_id=a.mip,
-                       institution_id=a.inst, experiment_id=a.experiment)
+        for exp in experiments:
+            records.append((exp, setJSONfname(a.model, a.mip, a.inst, exp)))
     else:
-        # if (a.verbose):
-        #     print('file:', a.loadfile)
-        print('load from file:', a.loadfile)
-        base = loadJSON(a.loadfile)
-
-    if (base is None):
-        exit(1)
-
-    # base_title = base['titles'][0]
-    # base_subject = base['subjects'][0]['subject']
+        for loadfile in a.loadfile:
+            if (loadfile == ''):
+                files = [setJSONfname(source_id=a.model, activity_id=a.mip,
+                                      institution_id=a.inst, experiment_id=exp)
+                         for exp in experiments]
+            else:
+                files = expandFiles([loadfile])
+            records += [(None, f) for f in files]
+
+    summary = []
+    for exp, fname in records:
+        if (a.loadfile is None):
+            base = getJSON(source_id=a.model, activity_id=a.mip,
+                           institution_id=a.inst, experiment_id=exp,
+                           use_cache=a.use_cache, refresh=a.refresh)
+        else:
+            print('load from file:', fname)
+            base = loadJSON(fname)
 
-    # if (a.verbose):
-    #     print('base title:', base_title)
-    #     print('base subject:', base_subject)
+        if (base is None):
+            summary.append((fname, None, None))
+            continue
 
-    data = addReference(base, a.reference) # base is preserved
-    if data is not None:
-        fname = setJSONfname(a.model, a.mip, a.inst, a.experiment)
-        with open(fname, 'w') as f:
+        data, added, skipped = addReferences(base, a.references) # base is preserved
+        summary.append((fname, added, skipped))
+        if data is not None:
             print('Saving base data to:', fname)
-            json.dump(data, f, indent=2)
+            dumpJSON(data, fname, compact=a.compact)
+
+    print('Summary:')
+    for fname, added, skipped in summary:
+        if added is None:
+            print(f'  {fname}: failed to get record')
+            continue
+        print(f'  {fname}: {len(added)} added, {len(skipped)} skipped')
+        for r in added:
+            print(f'    + {r}')
+        if (a.verbose):
+            for r in skipped:
+                print(f'    = {r}')
 
     print('Done.')
 
+    if any(added is None for fname, added, skipped in summary):
+        return 1
     return 0
 
 
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Asyncio API for the citation service.
+
+Async counterparts of `utils.getJSON()`, `utils.postJSON()` and
+`checkCiteComplete.getInfo()`.  They print nothing and return a
+`Result`, and share one connection pool of an `AsyncClient`, whose
+semaphore bounds the number of concurrent requests.  Requests are
+also paced by the `throttle.Throttle` of each host, shared with
+`utils.Client`.
+
+Requires aiohttp.
+
+Example::
+
+    async with AsyncClient(concurrency=20) as client:
+        results = await asyncio.gather(
+            *[client.getJSON('MIROC6', 'CMIP', 'MIROC', exp)
+              for exp in experiments])
+
+"""
+
+import time
+import asyncio
+import urllib.parse
+import utils
+from metrics import metrics
+from throttle import getThrottle
+
+
+class Result():
+    """
+    Result of a request.
+
+    `status` is the HTTP status or None if the request failed, `data`
+    the decoded JSON (or text) of the response, `error` the error
+    message if not successful, and `elapsed` the time in seconds.
+    """
+    __slots__ = ('status', 'data', 'error', 'elapsed')
+
+    def __init__(self, status=None, data=None, error=None, elapsed=0.0):
+        self.status = status
+        self.data = data
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.status == 200 and self.error is None
+
+    def __repr__(self):
+        return (f'Result({self.status}, error={self.error!r}, '
+                f'elapsed={self.elapsed:.3f})')
+
+
+class AsyncClient():
+    """
+    Asyncio client of the citation service.
+
+    One aiohttp session (connection pool) is shared by all requests,
+    and at most `concurrency` requests are in flight at a time.
+    Credentials for posting are read from ``~/.netrc`` once, unless
+    given as `auth` (``login:password``).
+
+    Use as ``async with AsyncClient() as client:``, or call `close()`.
+    """
+
+    def __init__(self, concurrency=10, connect_timeout=None,
+                 read_timeout=None, netrc_host='cera', auth=None):
+        self.concurrency = concurrency
+        self.connect_timeout = connect_timeout or utils.connectTimeout
+        self.read_timeout = read_timeout or utils.readTimeout
+        self.netrc_host = netrc_host
+        self._auth = auth
+        self._session = None
+        self._semaphore = None
+
+    async def session(self):
+        if self._session is None:
+            import aiohttp
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.connect_timeout,
+                    sock_read=self.read_timeout))
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    def authHeaders(self):
+        import base64
+        if self._auth is None:
+            login, password = utils.readCredentials(self.netrc_host)
+            self._auth = login + ':' + password
+        token = base64.b64encode(self._auth.encode('utf-8')).decode('ascii')
+        return {'Authorization': 'Basic ' + token}
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        await self.session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def request(self, method, url, params=None, headers=None,
+                      body=None):
+        """
+        Send a request and returns `Result`, where `data` is decoded
+        JSON if the status is 200.
+        """
+        session = await self.session()
+        endpoint = urllib.parse.urlsplit(url).path.rsplit('/', 1)[-1]
+        throttle = getThrottle(url)
+        async with self._semaphore:
+            await throttle.acquireAsync()
+            status = None
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                async with session.request(method, url, params=params,
+                                           headers=headers,
+                                           data=body) as r:
+                    retry_after = r.headers.get('Retry-After')
+                    raw = await r.read()
+                    status = r.status
+            except Exception as e:
+                status = 'error'
+                elapsed = time.perf_counter() - start
+                metrics.record(endpoint, 'error', elapsed)
+                return Result(error=f'{type(e).__name__}: {e}',
+                              elapsed=elapsed)
+            finally:
+                elapsed = time.perf_counter() - start
+                if status is None:
+                    # cancelled, e.g. by asyncio.wait_for().
+                    throttle.cancel()
+                else:
+                    throttle.release(endpoint, status, elapsed, retry_after)
+        metrics.record(endpoint, status, elapsed, len(raw))
+        text = raw.decode('utf-8')
+
+        if status != 200:
+            return Result(status, text, str(utils.errorMessage(text)),
+                          elapsed)
+        try:
+            data = utils.loadsJSON(text)
+        except ValueError:
+            data = text
+        return Result(status, data, None, elapsed)
+
+    async def getJSON(self, source_id=None, activity_id=None,
+                      institution_id=None, experiment_id=None):
+        """
+        Async version of `utils.getJSON()`, without response cache.
+        """
+        drs = utils.getDRS(source_id, activity_id, institution_id,
+                           experiment_id)
+        if drs is None:
+            return Result(error='incomplete DRS')
+        return await self.request('GET', utils.baseGetUrl,
+                                  params={'input': drs})
+
+    async def postJSON(self, jsonData, extra='check'):
+        """
+        Async version of `utils.postJSON()`.
+        """
+        headers = self.authHeaders()
+        headers['Content-Type'] = "application/json"
+        body = utils.dumpsJSON(jsonData, compact=True).encode('utf-8')
+        return await self.request('POST', utils.postURL(extra),
+                                  headers=headers, body=body)
+
+    async def getInfo(self, params=None):
+        """
+        Async version of `checkCiteComplete.getInfo()` with given
+        query `params`.
+        """
+        return await self.request('GET', utils.baseCitationsUrl,
+                                  params=params or {})
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Benchmark experiment expansion of addExperiments.py.
+
+---
+Compares addExperiment() with the former deepcopy() based expansion
+for a MIP-granularity record expanded to many experiments, and prints
+elapsed time and peak memory of each.
+
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from copy import deepcopy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from addExperiments import addExperiment
+from records import makeRecord
+
+desc, epilog = __doc__.split('---')
+
+
+def addExperimentDeepcopy(inData, experiment):
+    """
+    Former implementation of addExperiment().
+    """
+    data = deepcopy(inData)
+    data['subjects'][0]['subject'] += '.' + experiment
+    data['titles'][0] += ' ' + experiment
+    if 'identifier' in data:
+        del data['identifier']
+    return data
+
+
+def measure(func, base, experiments):
+    tracemalloc.start()
+    start = time.perf_counter()
+    res = [func(base, exp) for exp in experiments]
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del res
+    return elapsed, peak
+
+
+def my_parser():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog=epilog)
+    parser.add_argument('-n', '--nexp', type=int, default=200,
+                        help='number of experiments, default=%(default)s')
+    parser.add_argument('-c', '--ncreators', type=int, default=300,
+                        help='number of creators, default=%(default)s')
+    parser.add_argument('-r', '--nrelated', type=int, default=300,
+                        help='number of relatedIdentifiers, '
+                        'default=%(default)s')
+    return parser
+
+
+def main():
+    a = my_parser().parse_args()
+
+    base = makeRecord(a.ncreators, a.nrelated)
+    experiments = [f'exp{i:03d}' for i in range(a.nexp)]
+
+    print(f'Expanding to {a.nexp} experiments, '
+          f'{a.ncreators} creators, {a.nrelated} relatedIdentifiers:')
+    t_deep, m_deep = measure(addExperimentDeepcopy, base, experiments)
+    t_new, m_new = measure(addExperiment, base, experiments)
+    print(f'  deepcopy:      {t_deep*1000:9.2f} ms, '
+          f'peak {m_deep/1024**2:8.2f} MiB')
+    print(f'  addExperiment: {t_new*1000:9.2f} ms, '
+          f'peak {m_new/1024**2:8.2f} MiB')
+    print(f'  speedup: {t_deep/t_new:.1f}x, '
+          f'memory: {m_deep/max(m_new, 1):.1f}x less')
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Benchmark startup time of citationutil.py subcommands.
+
+---
+Runs `citationutil.py <command> --help` repeatedly in new interpreters
+and reports the median wall time of each command against the target,
+together with the time of a bare interpreter for reference.
+
+Exit status is 1 if some command misses the target.
+
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+desc, epilog = __doc__.split('---')
+
+topdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, topdir)
+from citationutil import commands
+
+# median startup time of `--help`, excluding bare interpreter startup.
+target = 0.100  # seconds
+
+
+def measure(args, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(args, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def my_parser():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog=epilog)
+    parser.add_argument('-n', '--repeat', type=int, default=10,
+                        help='runs per command, default=%(default)s')
+    parser.add_argument('-t', '--target', type=float, default=target,
+                        help='target in seconds, default=%(default)s')
+    return parser
+
+
+def main():
+    a = my_parser().parse_args()
+
+    script = os.path.join(topdir, 'citationutil.py')
+    base = measure([sys.executable, '-c', 'pass'], a.repeat)
+    print(f'  {"interpreter":16} {base*1000:7.1f} ms')
+
+    missed = 0
+    for cmd in commands:
+        t = measure([sys.executable, script, cmd, '--help'], a.repeat)
+        ok = (t - base) <= a.target
+        missed += not ok
+        print(f'  {cmd:16} {t*1000:7.1f} ms  (+{(t-base)*1000:6.1f} ms)  '
+              f'{"ok" if ok else "MISSED"}')
+    print(f'Target: +{a.target*1000:.0f} ms over interpreter startup.')
+
+    return 1 if missed else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Micro-benchmarks of the record transforms.
+
+---
+Measures addExperiments.addExperiment(), addReference.addReference(),
+utils.Creator construction and toJSON() (with and without
+utils.CreatorRegistry), modCreators.parseCreators() (with the shared
+registry warm, and cleared before each call) and validateJSON.validateRecord() on synthetic records of several sizes.
+
+Results are saved as JSON (--output) and can be compared with a
+previous run (--compare), e.g.
+
+  bench/benchTransforms.py -o before.json
+  (change something)
+  bench/benchTransforms.py -o after.json --compare before.json
+
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from utils import Creator, CreatorRegistry, creatorRegistry
+from addExperiments import addExperiment
+from addReference import addReference
+from modCreators import parseCreators
+from validateJSON import validateRecord
+from records import makeRecord
+
+desc, epilog = __doc__.split('---')
+
+# name: (ncreators, nrelated)
+sizes = {
+    'small': (10, 5),
+    'realistic': (100, 50),
+    'extreme': (5000, 5000),
+}
+
+
+def creatorsText(n):
+    return '\n'.join(f'Given{i} Family{i}, given{i}@example.org, '
+                     f'Institute {i % 17}, Somewhere, Japan'
+                     for i in range(n))
+
+
+def benchmarks(size):
+    """
+    Returns dict of benchmark functions for `size`.
+    """
+    ncreators, nrelated = sizes[size]
+    record = makeRecord(ncreators, nrelated)
+    text = creatorsText(ncreators)
+    names = [(f'Given{i}', f'Family{i}') for i in range(ncreators)]
+
+    def creators():
+        return [Creator(g, f, email='a@b', affiliation='X').toJSON()
+                for g, f in names]
+
+    registry = CreatorRegistry()
+
+    def registered():
+        return [registry.toJSON(registry.get(g, f, email='a@b',
+                                             affiliation='X'))
+                for g, f in names]
+
+    def parseCold():
+        creatorRegistry.clear()
+        return parseCreators(text)
+
+    return {
+        'addExperiment': lambda: addExperiment(record, 'historical'),
+        'addReference': lambda: addReference(record, '10.9999/new-ref'),
+        'Creator.toJSON': creators,
+        'CreatorRegistry.toJSON': registered,
+        'parseCreators': lambda: parseCreators(text),
+        'parseCreatorsCold': parseCold,
+        'validateRecord': lambda: validateRecord(record),
+    }
+
+
+def measure(func, min_time=0.2):
+    """
+    Returns best time per call in seconds.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def gitCommit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def my_parser():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog=epilog)
+    parser.add_argument('-o', '--output', type=str, default=None,
+                        help='save results to this JSON file')
+    parser.add_argument('-c', '--compare', type=str, default=None,
+                        help='previous results to compare with')
+    parser.add_argument('-s', '--size', type=str, nargs='+',
+                        choices=list(sizes), default=list(sizes),
+                        help='record sizes to run')
+    parser.add_argument('-k', '--filter', type=str, default=None,
+                        help='run only benchmarks containing this string')
+    return parser
+
+
+def main():
+    a = my_parser().parse_args()
+
+    prev = {}
+    if a.compare:
+        with open(a.compare) as f:
+            prev = json.load(f)['results']
+
+    results = {}
+    print(f'  {"benchmark":32} {"time":>12} {"previous":>12} {"ratio":>7}')
+    for size in a.size:
+        devnull = open(os.devnull, 'w')
+        for name, func in benchmarks(size).items():
+            key = f'{name}[{size}]'
+            if a.filter and a.filter not in key:
+                continue
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                t = measure(func)
+            finally:
+                sys.stdout = stdout
+            results[key] = t
+            line = f'  {key:32} {t*1e6:9.1f} us'
+            if key in prev:
+                line += f' {prev[key]*1e6:9.1f} us {t/prev[key]:7.2f}'
+            print(line)
+        devnull.close()
+
+    if a.output:
+        with open(a.output, 'w') as f:
+            json.dump({'commit': gitCommit(),
+                       'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'python': platform.python_version(),
+                       'sizes': sizes,
+                       'results': results}, f, indent=2)
+        print(f'Saved to "{a.output}"')
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Load benchmark of the citation service access.
+
+---
+Drives getJSON(), postJSON() and checkCiteComplete.getInfo() with
+concurrent requests against mockServer.py (started in this process
+unless --server is given) and reports requests/sec and p50/p99
+latency of each.  The client-side throttle (throttle.py) is disabled
+unless --throttle is given.
+
+"""
+
+import os
+import sys
+import time
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import utils
+import checkCiteComplete
+from mockServer import MockServer
+
+desc, epilog = __doc__.split('---')
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def run(name, func, args, jobs):
+    """
+    Call `func` for each of `args` with `jobs` threads.
+
+    Returns dict of statistics.
+    """
+    def timed(arg):
+        start = time.perf_counter()
+        ok = func(arg)
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull), \
+            ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(timed, args))
+    elapsed = time.perf_counter() - start
+
+    latencies = [r[0] for r in results]
+    return {'name': name,
+            'requests': len(results),
+            'errors': len([r for r in results if not r[1]]),
+            'elapsed': elapsed,
+            'rps': len(results) / elapsed if elapsed > 0 else 0.0,
+            'p50': percentile(latencies, 50),
+            'p99': percentile(latencies, 99)}
+
+
+def my_parser():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog=epilog)
+    parser.add_argument('--server', type=str, default=None,
+                        help='URL of running mock server')
+    parser.add_argument('-n', '--requests', type=int, default=500,
+                        help='requests per API, default=%(default)s')
+    parser.add_argument('-j', '--jobs', type=int, default=8,
+                        help='concurrent requests, default=%(default)s')
+    parser.add_argument('-l', '--latency', type=float, default=0.0,
+                        help='latency of mock server in seconds, '
+                        'default=%(default)s')
+    parser.add_argument('-e', '--error_rate', type=float, default=0.0,
+                        help='error rate of mock server, '
+                        'default=%(default)s')
+    parser.add_argument('--throttle', action='store_true', default=False,
+                        help='pace requests by throttle.py')
+    return parser
+
+
+def main():
+    a = my_parser().parse_args()
+
+    server = None
+    if a.server:
+        url = a.server
+    else:
+        server = MockServer(latency=a.latency, error_rate=a.error_rate)
+        server.start()
+        url = server.url
+
+    utils.setServer(url)
+    utils.setClient(utils.Client(pool_size=a.jobs, retries=0,
+                                 auth='bench:bench', throttle=a.throttle))
+
+    def get(i):
+        return utils.getJSON('MIROC6', 'CMIP', 'MIROC', f'exp{i:05d}',
+                             use_cache=False) is not None
+
+    record = utils.getJSON('MIROC6', 'CMIP', 'MIROC', use_cache=False)
+
+    def post(i):
+        return utils.postJSON(record, extra='check') == 200
+
+    def info(i):
+        return checkCiteComplete.getInfo() is not None
+
+    print(f'Server: {url}, requests: {a.requests}, jobs: {a.jobs}')
+    print(f'  {"API":16} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9} '
+          f'{"errors":>7}')
+    for name, func in (('exportcmip6', get),
+                       ('citation POST', post),
+                       ('cmip6Citations', info)):
+        r = run(name, func, range(a.requests), a.jobs)
+        print(f'  {r["name"]:16} {r["rps"]:9.1f} {r["p50"]*1000:9.2f} '
+              f'{r["p99"]*1000:9.2f} {r["errors"]:7d}')
+
+    if server is not None:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,48 @@
+# -*- coding: utf-8-*-
+"""\
+Synthetic DataCite-style records for benchmarks.
+
+"""
+
+
+def makeCreator(i):
+    return {'affiliation': f'Institute {i % 17}, Somewhere, Japan',
+            'creatorName': f'Family{i}, Given{i}',
+            'email': f'given{i}.family{i}@example.org',
+            'familyName': f'Family{i}',
+            'givenName': f'Given{i}'}
+
+
+def makeRecord(ncreators=50, nrelated=50,
+               mip='CMIP', inst='MIROC', model='MIROC6'):
+    """
+    Make a MIP-granularity record with `ncreators` creators and
+    `nrelated` related identifiers.
+    """
+    drs = '.'.join(['CMIP6', mip, inst, model])
+    return {
+        'identifier': {'id': '10.22033/ESGF/CMIP6.0000',
+                       'identifierType': 'DOI'},
+        'creators': [makeCreator(i) for i in range(ncreators)],
+        'titles': [f'{inst} {model} model output prepared for CMIP6 {mip}'],
+        'publisher': 'Earth System Grid Federation',
+        'publicationYear': '2019',
+        'subjects': [{'subject': drs,
+                      'schemeURI': 'http://github.com/WCRP-CMIP/CMIP6_CVs',
+                      'subjectScheme': 'DRS'}],
+        'contributors': [{'contributorName': 'DKRZ',
+                          'contributorType': 'HostingInstitution'}],
+        'dates': [{'date': '2019-06-26', 'dateType': 'Created'}],
+        'language': 'en',
+        'resourceType': {'resourceType': 'Digital',
+                         'resourceTypeGeneral': 'Dataset'},
+        'relatedIdentifiers': [
+            {'relatedIdentifier': f'10.5194/gmd-{i:04d}-2019',
+             'relatedIdentifierType': 'DOI',
+             'relationType': 'References' if i % 2 else 'IsDocumentedBy'}
+            for i in range(nrelated)],
+        'rightsList': [{'rights': 'Creative Commons Attribution 4.0',
+                        'rightsURI': 'https://creativecommons.org/licenses/by/4.0/'}],
+        'descriptions': [{'description': 'x' * 2000,
+                          'descriptionType': 'Abstract'}],
+    }
@@ -9,21 +9,45 @@ Access API URL with several attributes, the data reference information
 in JSON format is returned.  Valid attributes are: `institutionId`,
 `sourceId`, `complete` (true|false), `drsId`.
 
+Several values can be given to --inst, --model and --drsId; one query
+is made for each combination of them, in parallel (see --jobs), and
+the results are merged into one report (and one snapshot) without
+duplicated `DRS_ID`.  If some of the queries failed, records of the
+others are reported, but neither saved nor compared by --diff, and the
+exit status is 1.
+
+With --diff, the response is compared with a previous snapshot saved
+by --save (the latest one if no file is given), and only records
+added, removed, or changed their completion status are reported.
+
+With --summary, completion rates per MIP, model and experiment are
+printed instead of each record (see citeStats.py, requires pandas).
+
+With --stream, records are parsed one by one as they arrive (or are
+read from --load file), so memory use does not grow with the size of
+the response.  Multiple queries are then made one after another.
+
 See <https://redmine.dkrz.de/projects/cmip6-lta-and-data-citation/wiki/Wiki#Information-for-ESGF-Data-Node-Managers-and-other-external-service-providers>.
 """
-import urllib3
-import certifi
-import json
+import os
+import glob
 import argparse
+import textwrap
 import datetime
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import utils
+from utils import getClient, iterJSONArray, errorMessage
+from utils import loadJSON, loadsJSON, dumpJSON, dumpsJSON
+from metrics import metrics
 
 __author__ = 'T.Inoue'
 __credits__ = 'Copyright (c) 2019 RIST'
 __version__ = 'v20190626'
 __date__ = '2019/06/26'
 
-base_url = ("https://cera-www.dkrz.de/WDCC/ui/cerasearch/"
-            "cerarest/cmip6Citations")
+# None for `utils.baseCitationsUrl` at request time (see utils.setServer)
+base_url = None
 params = {
     # 'institutionId': 'MIROC',
     # 'sourceId': 'MIROC6',
@@ -34,55 +58,308 @@ params = {
 desc, epilog = __doc__.split('---')
 
 
-def getInfo():
+def getInfo(query=None):
     """
     Access API and get information as JSON format.
+
+    `query` is a dict of attributes, default is `params`.
     """
-    print('HTTP access with params:', params)
-    http = urllib3.PoolManager(
-        cert_reqs='CERT_REQUIRED',
-        ca_certs=certifi.where())
-    r = http.request_encode_url('GET', base_url, fields=params)
+    if query is None:
+        query = params
+    print('HTTP access with params:', query)
+    r = getClient().get(base_url or utils.baseCitationsUrl,
+                         fields=query)
 
     if (r.status != 200):
         print('Bad Status:', r.status)
-        d = eval(r.data.decode('utf-8'))
-        print(d['error'])
+        print(errorMessage(r.data.decode('utf-8')))
         return None
-    jsonData = json.loads(r.data.decode('utf-8'))
+    jsonData = loadsJSON(r.data)
     return jsonData
 
 
+def iterInfo(query=None, chunk_size=65536, failed=None):
+    """
+    Access API and yield information record by record, without reading
+    the whole response into memory.
+
+    If the request failed, nothing is yielded and `query` is appended
+    to list `failed` if given.
+    """
+    if query is None:
+        query = params
+    print('HTTP access with params:', query)
+    r = getClient().get(base_url or utils.baseCitationsUrl,
+                         fields=query, preload_content=False)
+
+    try:
+        if (r.status != 200):
+            print('Bad Status:', r.status)
+            print(errorMessage(r.data.decode('utf-8')))
+            if failed is not None:
+                failed.append(query)
+            return
+        yield from iterJSONArray(r.stream(chunk_size))
+    finally:
+        r.release_conn()
+
+
+def expandQueries(params):
+    """
+    Returns list of queries, one for each combination of values of
+    `params`, where a value may be a list.
+    """
+    keys = list(params)
+    values = [v if isinstance(v, list) else [v] for v in params.values()]
+    return [dict(zip(keys, c)) for c in itertools.product(*values)]
+
+
+def uniqueInfo(docs, seen=None):
+    """
+    Yield records of `docs` except those of `DRS_ID` already seen.
+    """
+    if seen is None:
+        seen = set()
+    for d in docs:
+        if d['DRS_ID'] in seen:
+            continue
+        seen.add(d['DRS_ID'])
+        yield d
+
+
+class QueryError(Exception):
+    """
+    Some of the queries failed; `failed` is the list of them, and `docs`
+    the records of the others.
+    """
+
+    def __init__(self, failed, docs=None):
+        super().__init__(f'{len(failed)} queries failed: {failed}')
+        self.failed = failed
+        self.docs = docs
+
+
+def getInfoAll(queries, jobs=4):
+    """
+    Run getInfo() for each of `queries` in parallel over the shared
+    connection pool, and merge the results.
+
+    Returns list of records without duplicated `DRS_ID`, in order of
+    `queries`, or None if the only query failed.  If some of several
+    queries failed, raises `QueryError` holding the merged records of
+    the others.
+    """
+    if len(queries) == 1:
+        return getInfo(queries[0])
+
+    def get(query):
+        try:
+            return getInfo(query)
+        except Exception as e:
+            print('Error:', e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(get, queries))
+    failed = [q for q, r in zip(queries, results) if r is None]
+    docs = list(uniqueInfo(itertools.chain.from_iterable(
+        r for r in results if r is not None)))
+    if failed:
+        raise QueryError(failed, docs)
+    return docs
+
+
+def iterInfoAll(queries):
+    """
+    Run iterInfo() for each of `queries` one after another, and yield
+    records without duplicated `DRS_ID`.
+
+    Raises `QueryError` after all records are yielded if some of the
+    queries failed.
+    """
+    seen = set()
+    failed = []
+    for query in queries:
+        yield from uniqueInfo(iterInfo(query, failed=failed), seen)
+    if failed:
+        raise QueryError(failed)
+
+
 def loadInfo(fname):
     """
     Load local JSON file instead of accessing API
     """
 
     print(f'Loading from "{fname}"')
-    with open(fname, 'r') as f:
-        jsonData = json.load(f)
+    jsonData = loadJSON(fname)
     return jsonData
 
 
-def saveInfo(docs, fname):
+def iterLoadInfo(fname, chunk_size=65536):
+    """
+    Load local JSON file and yield records one by one.
+    """
+
+    print(f'Loading from "{fname}"')
+    with open(fname, 'rb') as f:
+        yield from iterJSONArray(iter(lambda: f.read(chunk_size), b''))
+
+
+def snapshotName():
+    datestr = datetime.date.today().strftime('%Y%m%d')
+
+    fname = datestr+'Citation'
+    for key in ('institutionId', 'sourceId'):
+        if key in params:
+            value = params[key]
+            if isinstance(value, list):
+                value = '+'.join(value)
+            fname += '.' + value
+    fname += '.json'
+    return fname
+
+
+def saveInfo(docs, fname, compact=False):
     if not fname:
-        datestr = datetime.date.today().strftime('%Y%m%d')
-
-        fname = datestr+'Citation'
-        if 'institutionId' in params:
-            fname += '.' + params['institutionId']
-        if 'sourceId' in params:
-            fname += '.' + params['sourceId']
-        fname += '.json'
-    with open(fname, 'w') as f:
-        json.dump(docs, f, indent=2)
+        fname = snapshotName()
+    dumpJSON(docs, fname, compact=compact)
     print(f'Saved to "{fname}"')
 
 
+def iterSaveInfo(docs, fname, compact=False):
+    """
+    Save records while passing them through, output is the same as
+    saveInfo().  Nothing is saved if `docs` is empty, or raised an
+    exception, e.g. `QueryError`.
+    """
+    if not fname:
+        fname = snapshotName()
+    if compact:
+        first, sep, last = '[', ',', ']'
+    else:
+        first, sep, last = '[\n', ',\n', '\n]'
+    f = None
+    complete = False
+    try:
+        for d in docs:
+            if f is None:
+                f = open(fname, 'w')
+                f.write(first)
+            else:
+                f.write(sep)
+            if compact:
+                f.write(dumpsJSON(d, compact=True))
+            else:
+                f.write(textwrap.indent(dumpsJSON(d, indent=2), '  '))
+            yield d
+        if f is not None:
+            f.write(last)
+        complete = True
+    finally:
+        if f is not None:
+            f.close()
+            if complete:
+                print(f'Saved to "{fname}"')
+            else:
+                os.remove(fname)
+                print(f'Not saved to "{fname}", records are incomplete.')
+
+
 def checkCompleteness(docs):
+    """
+    Print completeness of each record.
+
+    Returns number of records.
+    """
     print('Check citation completeness:')
+    n = 0
     for d in docs:
         print(f'  {d["DRS_ID"]}: {d["CITATION_COMPLETED"]}')
+        n += 1
+    return n
+
+
+def checkSummary(docs):
+    """
+    Print summary of completeness by citeStats.printSummary().
+
+    Returns number of records.
+    """
+    from citeStats import loadFrame, printSummary
+    df = loadFrame(docs)
+    printSummary(df, incomplete=True)
+    return len(df)
+
+
+def latestSnapshot(exclude=None):
+    """
+    Returns the latest snapshot filename for current `params`, except
+    `exclude`, or None if not found.
+    """
+    pattern = '[0-9]'*8 + snapshotName()[8:]
+    files = sorted(f for f in glob.glob(pattern) if f != exclude)
+    if not files:
+        return None
+    return files[-1]
+
+
+def indexInfo(docs):
+    """
+    Returns dict of `CITATION_COMPLETED` keyed by `DRS_ID`.
+    """
+    return {d['DRS_ID']: d['CITATION_COMPLETED'] for d in docs}
+
+
+def diffInfo(prev, docs):
+    """
+    Compare `docs` with `prev` given by indexInfo().
+
+    Returns tuple of lists (added, removed, changed), where `added` and
+    `removed` are lists of (DRS_ID, status), and `changed` is a list
+    of (DRS_ID, previous status, current status).
+    """
+    seen = set()
+    added = []
+    changed = []
+    for d in docs:
+        drs = d['DRS_ID']
+        status = d['CITATION_COMPLETED']
+        seen.add(drs)
+        if drs not in prev:
+            added.append((drs, status))
+        elif prev[drs] != status:
+            changed.append((drs, prev[drs], status))
+    removed = [(drs, status) for drs, status in prev.items()
+               if drs not in seen]
+    return added, removed, changed
+
+
+def checkDiff(docs, prev):
+    """
+    Print difference of completeness from `prev`, see diffInfo().
+
+    Returns number of records.
+    """
+    n = 0
+
+    def count(docs):
+        nonlocal n
+        for d in docs:
+            n += 1
+            yield d
+
+    added, removed, changed = diffInfo(prev, count(docs))
+    print('Check citation completeness difference:')
+    print(f'  {len(prev)} previous, {n} current records.')
+    for drs, status in added:
+        print(f'  + {drs}: {status}')
+    for drs, status in removed:
+        print(f'  - {drs}: {status}')
+    for drs, before, after in changed:
+        print(f'  * {drs}: {before} -> {after}')
+    if not (added or removed or changed):
+        print('  no changes.')
+    return n
 
 
 def my_parser():
@@ -97,28 +374,50 @@ def my_parser():
         '--save', type=str, nargs='?', const='', default=None)
     parser.add_argument(
         '--load', type=str, default=None, help='JSON file')
+    parser.add_argument(
+        '--compact', action='store_true', default=False,
+        help='save compact JSON for machine use')
+    parser.add_argument(
+        '--diff', type=str, nargs='?', const='', default=None,
+        help='previous snapshot to compare with, default is the latest')
+    parser.add_argument(
+        '--metrics', type=str, default=None,
+        help='save request metrics (Prometheus text if *.prom, else JSON)')
+    parser.add_argument(
+        '--stream', action='store_true', default=False,
+        help='parse records incrementally to keep memory use flat')
+    parser.add_argument(
+        '--summary', action='store_true', default=False,
+        help='print completion rates per MIP/model/experiment')
 
     parser.add_argument(
         '-a', '--mip', '--activity_id', type=str, default=None)
     parser.add_argument(
-        '-i', '--inst', '--institution_id', type=str, default=None)
+        '-i', '--inst', '--institution_id', type=str, nargs='+',
+        default=None)
     parser.add_argument(
-        '-s', '--model', '--source_id', type=str, default=None)
+        '-s', '--model', '--source_id', type=str, nargs='+', default=None)
     parser.add_argument(
         '-e', '--exp', '--experiment_id', type=str, default=None)
     parser.add_argument(
-        '-d', '--drsId', type=str, default=None)
+        '-d', '--drsId', type=str, nargs='+', default=None)
     parser.add_argument(
         '-c', '--complete', type=str, default=None,
         help="select complete status (True or False)")
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=4,
+        help='number of parallel queries, default=%(default)s')
 
     return parser
 
 
-def main():
+def main(argv=None):
 
     parser = my_parser()
-    a = parser.parse_args()
+    a = parser.parse_args(argv)
+
+    if a.metrics:
+        metrics.dumpAtExit(a.metrics)
 
     if a.verbose:
         print('Arguments:')
@@ -128,28 +427,77 @@ def main():
         print('  source_id:', a.model)
         print('  drsId:', a.drsId)
         print('  complete:', a.complete)
+        print('  jobs:', a.jobs)
+        print('  diff:', a.diff)
+        print('  stream:', a.stream)
+        print('  summary:', a.summary)
+
+    def value(v):
+        return v[0] if len(v) == 1 else v
 
     if a.inst:
-        params.update({'institutionId': a.inst})
+        params.update({'institutionId': value(a.inst)})
     if a.model:
-        params.update({'sourceId': a.model})
+        params.update({'sourceId': value(a.model)})
     if a.drsId:
-        params.update({'drsId': a.drsId})
+        params.update({'drsId': value(a.drsId)})
     if a.complete:
         params.update({'complete': a.complete})
+    queries = expandQueries(params)
+
+    check = checkCompleteness
+    if a.summary:
+        check = checkSummary
+    if a.diff is not None:
+        prevfile = a.diff
+        if not prevfile:
+            exclude = None
+            if a.save is not None:
+                exclude = a.save or snapshotName()
+            prevfile = latestSnapshot(exclude)
+        if not prevfile:
+            print('No previous snapshot found.')
+            return 1
+        prev = indexInfo(iterLoadInfo(prevfile))
+        check = lambda docs: checkDiff(docs, prev)
+
+    if a.stream:
+        if a.load:
+            docs = iterLoadInfo(a.load)
+        else:
+            docs = iterInfoAll(queries)
+        if a.save is not None:
+            docs = iterSaveInfo(docs, a.save, compact=a.compact)
+        try:
+            if check(docs) == 0:
+                return 1
+        except QueryError as e:
+            print('Failed queries:', e.failed)
+            return 1
+        return 0
 
     if a.load:
         docs = loadInfo(a.load)
     else:
-        docs = getInfo()
+        try:
+            docs = getInfoAll(queries, jobs=a.jobs)
+        except QueryError as e:
+            print('Failed queries:', e.failed)
+            if a.save is not None:
+                print('Not saved, records are incomplete.')
+            if a.diff is not None:
+                print('Not compared, records are incomplete.')
+            elif e.docs:
+                check(e.docs)
+            return 1
 
     if not docs:
         return 1
 
     if a.save is not None:
-        saveInfo(docs, a.save)
+        saveInfo(docs, a.save, compact=a.compact)
 
-    checkCompleteness(docs)
+    check(docs)
 
     return 0
 
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Single entry point for the CitationUtil scripts.
+
+---
+Each subcommand runs the corresponding script with the remaining
+arguments, e.g.
+
+  citationutil.py get -a CMIP -s MIROC6      (same as getJSON.py ...)
+  citationutil.py post --do_post *.json      (same as postJSON.py ...)
+
+Use `citationutil.py <command> -h` for help of each command.
+
+Only the module of the chosen command is imported, so that heavy
+dependencies (pandas, urllib3) are loaded only when needed.
+"""
+
+import os
+import sys
+import argparse
+import importlib
+
+desc, epilog = __doc__.split('---')
+
+# command: (module, help)
+commands = {
+    'get': ('getJSON', 'download JSON of MIP/experiment granularity'),
+    'add-experiments': ('addExperiments',
+                        'make experiment granularity JSON from MIP one'),
+    'add-reference': ('addReference', 'add reference DOIs to JSON'),
+    'mod-creators': ('modCreators', 'replace creators by an excel file'),
+    'validate': ('validateJSON', 'validate JSON locally'),
+    'post': ('postJSON', 'check/post JSON'),
+    'check': ('checkCiteComplete', 'check completion of citation info'),
+    'stats': ('citeStats', 'summarize completion of citation info'),
+    'index': ('citeIndex', 'index JSON files in SQLite and query it'),
+    'pipeline': ('pipeline', 'get, modify, check and post in one run'),
+}
+
+
+def my_parser():
+    cmd_help = '\n'.join(f'  {k:16} {v[1]}' for k, v in commands.items())
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog='commands:\n' + cmd_help + '\n' + epilog)
+    parser.add_argument('command',
+                        choices=list(commands), metavar='command',
+                        help='one of: ' + ', '.join(commands))
+    parser.add_argument('args',
+                        nargs=argparse.REMAINDER,
+                        help='arguments of the command')
+    return parser
+
+
+def main(argv=None):
+    parser = my_parser()
+    a = parser.parse_args(argv)
+
+    module = importlib.import_module(commands[a.command][0])
+    # show "citationutil.py <command>" in usage of the command.
+    sys.argv[0] = os.path.basename(sys.argv[0]) + ' ' + a.command
+    return module.main(a.args)
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Index citation records in a local SQLite database, and query it.
+
+---
+JSON files made by getJSON.py etc. (`CMIP6.<mip>.<inst>.<model>[.<exp>].json`)
+and snapshots saved by checkCiteComplete.py are ingested into tables of
+records, creators, related identifiers and completeness status.  Only
+files added or modified (by mtime) since the last run are read again,
+and files deleted are removed from the index.  Other JSON files (e.g.
+reports of postJSON.py) are skipped.
+
+Completeness is kept per snapshot, and queries use the status in the
+latest snapshot (by filename, which starts with date) of each DRS.
+
+  citeIndex.py .                         (update the index by files in .)
+  citeIndex.py --creator Inoue           (records listing creator)
+  citeIndex.py --lacking 10.5194/gmd-... (records without the reference)
+  citeIndex.py --incomplete              (citation not completed)
+
+Queries match creator by name or email (SQL LIKE, case insensitive).
+Queries may be combined with files, the index is updated first.
+
+"""
+
+import os
+import sqlite3
+import argparse
+from utils import loadJSON, expandFiles
+
+desc, epilog = __doc__.split('---')
+
+schema = '''
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL,
+    kind TEXT);
+CREATE TABLE IF NOT EXISTS records (
+    path TEXT PRIMARY KEY,
+    drs TEXT,
+    mip TEXT,
+    institution TEXT,
+    model TEXT,
+    experiment TEXT,
+    title TEXT,
+    doi TEXT);
+CREATE INDEX IF NOT EXISTS records_drs ON records (drs);
+CREATE TABLE IF NOT EXISTS creators (
+    path TEXT,
+    pos INTEGER,
+    creatorName TEXT,
+    givenName TEXT,
+    familyName TEXT,
+    email TEXT,
+    affiliation TEXT);
+CREATE INDEX IF NOT EXISTS creators_path ON creators (path);
+CREATE INDEX IF NOT EXISTS creators_name ON creators (creatorName);
+CREATE TABLE IF NOT EXISTS related (
+    path TEXT,
+    identifier TEXT,
+    identifierType TEXT,
+    relationType TEXT);
+CREATE INDEX IF NOT EXISTS related_path ON related (path);
+CREATE INDEX IF NOT EXISTS related_identifier ON related (identifier);
+CREATE TABLE IF NOT EXISTS completeness (
+    path TEXT,
+    snapshot TEXT,
+    drs TEXT,
+    complete INTEGER);
+CREATE INDEX IF NOT EXISTS completeness_path ON completeness (path);
+CREATE INDEX IF NOT EXISTS completeness_drs ON completeness (drs, snapshot);
+'''
+
+# bump when `schema` changes, the index is then rebuilt from scratch.
+schemaVersion = 2
+
+
+def fileKind(data):
+    """
+    Returns ``'record'``, ``'snapshot'`` or None (other) for JSON `data`.
+    """
+    if isinstance(data, dict):
+        subjects = data.get('subjects')
+        if (isinstance(subjects, list) and subjects
+                and isinstance(subjects[0], dict)
+                and 'subject' in subjects[0]):
+            return 'record'
+    elif isinstance(data, list):
+        if all(isinstance(d, dict) and 'DRS_ID' in d
+               and 'CITATION_COMPLETED' in d for d in data):
+            return 'snapshot'
+    return None
+
+
+def splitDRS(drs):
+    """
+    Returns (mip, institution, model, experiment) of `drs`, experiment
+    is None for MIP granularity.
+    """
+    parts = drs.split('.', 4)[1:] + [None] * 4
+    return tuple(parts[:4])
+
+
+class CiteIndex():
+    """
+    SQLite index of citation records and snapshots.
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        self.db = sqlite3.connect(fname)
+        version = self.db.execute('PRAGMA user_version').fetchone()[0]
+        if version != schemaVersion:
+            tables = [r[0] for r in self.db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")]
+            for table in tables:
+                self.db.execute(f'DROP TABLE {table}')
+            self.db.execute(f'PRAGMA user_version = {schemaVersion}')
+        self.db.executescript(schema)
+
+    def close(self):
+        self.db.close()
+
+    def remove(self, path):
+        for table in ('files', 'records', 'creators', 'related',
+                      'completeness'):
+            self.db.execute(f'DELETE FROM {table} WHERE path = ?', (path,))
+
+    def addRecord(self, path, data):
+        drs = data['subjects'][0]['subject']
+        title = (data.get('titles') or [None])[0]
+        doi = (data.get('identifier') or {}).get('id')
+        self.db.execute('INSERT INTO records VALUES (?,?,?,?,?,?,?,?)',
+                        (path, drs) + splitDRS(drs) + (title, doi))
+        self.db.executemany(
+            'INSERT INTO creators VALUES (?,?,?,?,?,?,?)',
+            [(path, i, c.get('creatorName'), c.get('givenName'),
+              c.get('familyName'), c.get('email'), c.get('affiliation'))
+             for i, c in enumerate(data.get('creators', []))])
+        self.db.executemany(
+            'INSERT INTO related VALUES (?,?,?,?)',
+            [(path, r.get('relatedIdentifier'),
+              r.get('relatedIdentifierType'), r.get('relationType'))
+             for r in data.get('relatedIdentifiers', [])])
+
+    def addSnapshot(self, path, docs):
+        snapshot = os.path.basename(path)
+        self.db.executemany(
+            'INSERT INTO completeness VALUES (?,?,?,?)',
+            [(path, snapshot, d['DRS_ID'],
+              str(d['CITATION_COMPLETED']).lower() == 'true')
+             for d in docs])
+
+    def update(self, files):
+        """
+        Ingest `files` added or modified since the last update, and
+        remove files no longer exist.  Files neither records nor
+        snapshots are skipped, and remembered not to be read again
+        unless modified.
+
+        Returns tuple of numbers (updated, unchanged, removed, skipped,
+        failed).
+        """
+        known = dict(self.db.execute('SELECT path, mtime FROM files'))
+        nupdated = nunchanged = nremoved = nskipped = nfailed = 0
+        with self.db:
+            for path in known:
+                if not os.path.exists(path):
+                    self.remove(path)
+                    nremoved += 1
+            for fname in files:
+                path = os.path.abspath(fname)
+                try:
+                    mtime = os.stat(path).st_mtime
+                    if known.get(path) == mtime:
+                        nunchanged += 1
+                        continue
+                    data = loadJSON(path)
+                    self.remove(path)
+                    kind = fileKind(data)
+                    if kind == 'snapshot':
+                        self.addSnapshot(path, data)
+                        nupdated += 1
+                    elif kind == 'record':
+                        self.addRecord(path, data)
+                        nupdated += 1
+                    else:
+                        kind = 'other'
+                        nskipped += 1
+                    self.db.execute('INSERT INTO files VALUES (?,?,?)',
+                                    (path, mtime, kind))
+                except Exception as e:
+                    print(f'{fname}: {e}')
+                    self.remove(path)
+                    nfailed += 1
+        return nupdated, nunchanged, nremoved, nskipped, nfailed
+
+    def byCreator(self, name):
+        """
+        Returns list of (drs, path) of records listing creator `name`.
+        """
+        pattern = f'%{name}%'
+        return self.db.execute(
+            'SELECT DISTINCT r.drs, r.path FROM records r '
+            'JOIN creators c ON c.path = r.path '
+            'WHERE c.creatorName LIKE ? OR c.email LIKE ? '
+            'ORDER BY r.drs', (pattern, pattern)).fetchall()
+
+    def lacking(self, identifier):
+        """
+        Returns list of (drs, path) of records without related
+        `identifier`.
+        """
+        return self.db.execute(
+            'SELECT r.drs, r.path FROM records r '
+            'WHERE NOT EXISTS (SELECT 1 FROM related l '
+            'WHERE l.path = r.path AND l.identifier = ?) '
+            'ORDER BY r.drs', (identifier,)).fetchall()
+
+    def incomplete(self):
+        """
+        Returns list of (drs, snapshot) not completed in the latest
+        snapshot.
+        """
+        return self.db.execute(
+            'SELECT drs, snapshot FROM completeness c '
+            'WHERE snapshot = (SELECT MAX(snapshot) FROM completeness '
+            'WHERE drs = c.drs) AND NOT complete '
+            'ORDER BY drs').fetchall()
+
+
+def my_parser():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog=epilog)
+    parser.add_argument('files',
+                        type=str, nargs='*',
+                        help='JSON files, directories or glob patterns '
+                        'to index')
+    parser.add_argument('-d', '--db',
+                        type=str,
+                        help='database file, default=%(default)s',
+                        default='citeIndex.db')
+    parser.add_argument('--creator',
+                        type=str,
+                        help='list records with creator NAME or email',
+                        metavar='NAME',
+                        default=None)
+    parser.add_argument('--lacking',
+                        type=str,
+                        help='list records without related identifier ID',
+                        metavar='ID',
+                        default=None)
+    parser.add_argument('--incomplete',
+                        action='store_true',
+                        help='list records not completed',
+                        default=False)
+    return parser
+
+
+def main(argv=None):
+    parser = my_parser()
+    a = parser.parse_args(argv)
+
+    index = CiteIndex(a.db)
+    nfailed = 0
+    try:
+        if a.files:
+            files = expandFiles(a.files)
+            (nupdated, nunchanged, nremoved, nskipped,
+             nfailed) = index.update(files)
+            print(f'{a.db}: {nupdated} updated, {nunchanged} unchanged, '
+                  f'{nremoved} removed, {nskipped} skipped, '
+                  f'{nfailed} failed.')
+
+        if a.creator:
+            rows = index.byCreator(a.creator)
+            print(f'creator "{a.creator}": {len(rows)} records')
+            for drs, path in rows:
+                print(f'  {drs}: {path}')
+        if a.lacking:
+            rows = index.lacking(a.lacking)
+            print(f'lacking "{a.lacking}": {len(rows)} records')
+            for drs, path in rows:
+                print(f'  {drs}: {path}')
+        if a.incomplete:
+            rows = index.incomplete()
+            print(f'incomplete: {len(rows)} records')
+            for drs, snapshot in rows:
+                print(f'  {drs}: {snapshot}')
+    finally:
+        index.close()
+    return 1 if nfailed else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Summarize completion of citation info in snapshots.
+
+---
+Snapshots saved by checkCiteComplete.py (--save) are loaded into a
+pandas DataFrame, `DRS_ID` is split into its components
+(mip, institution, model, experiment), and the completion rate is
+aggregated per each of --by keys, e.g.
+
+  citeStats.py 20191229Citation.MIROC.json --by mip model
+  citeStats.py 20191229Citation.MIROC.json --incomplete -o stats
+
+With -o DIR, tables are saved as `<key>.csv` in DIR (or `<key>.parquet`
+with --parquet, which requires pyarrow or fastparquet), and incomplete records as
+`incomplete.csv`.
+
+"""
+
+import os
+import argparse
+import importlib.util
+from utils import loadJSON
+
+desc, epilog = __doc__.split('---')
+
+drsColumns = ['project', 'mip', 'institution', 'model', 'experiment']
+parquetEngines = ('pyarrow', 'fastparquet')
+
+
+def loadFrame(docs):
+    """
+    Returns DataFrame of `docs` (list of records, or a snapshot
+    filename) with `DRS_ID`, `complete` (bool) and DRS component
+    columns.  `experiment` is empty for records of MIP granularity.
+    """
+    import pandas as pd
+
+    if isinstance(docs, str):
+        docs = loadJSON(docs)
+    df = pd.DataFrame(list(docs), columns=['DRS_ID', 'CITATION_COMPLETED'])
+    df['complete'] = (df['CITATION_COMPLETED'].astype(str)
+                      .str.lower().eq('true'))
+    parts = df['DRS_ID'].str.split('.', n=len(drsColumns)-1, expand=True)
+    parts = parts.reindex(columns=range(len(drsColumns)))
+    parts.columns = drsColumns
+    df = pd.concat([df[['DRS_ID', 'complete']], parts.fillna('')], axis=1)
+    return df
+
+
+def summarize(df, by):
+    """
+    Returns table of total, complete and incomplete counts and
+    completion rate per value(s) of `by`.
+    """
+    g = df.groupby(by, sort=True)['complete']
+    table = g.agg(total='size', complete='sum')
+    table['incomplete'] = table['total'] - table['complete']
+    table['rate'] = table['complete'] / table['total']
+    return table
+
+
+def incompleteRecords(df):
+    """
+    Returns rows of `df` not completed.
+    """
+    return df.loc[~df['complete'], ['DRS_ID'] + drsColumns[1:]]
+
+
+def saveTable(table, fname):
+    if fname.endswith('.parquet'):
+        table.to_parquet(fname)
+    else:
+        table.to_csv(fname)
+    print(f'Saved to "{fname}"')
+
+
+def printSummary(df, by=('mip', 'model', 'experiment'), incomplete=False,
+                 output=None, parquet=False):
+    """
+    Print (and save to `output` directory) summary tables of `df`.
+    """
+    import pandas as pd
+
+    ext = '.parquet' if parquet else '.csv'
+    if output:
+        os.makedirs(output, exist_ok=True)
+    total = len(df)
+    ncomplete = int(df['complete'].sum())
+    print('Citation completeness summary:')
+    print(f'  records: {total}, complete: {ncomplete}, '
+          f'incomplete: {total - ncomplete}')
+    with pd.option_context('display.max_rows', None,
+                           'display.width', 120,
+                           'display.float_format', '{:.1%}'.format):
+        for key in by:
+            table = summarize(df, key)
+            print(f'\nper {key}:')
+            print(table.to_string())
+            if output:
+                saveTable(table, os.path.join(output, key + ext))
+        if incomplete:
+            rows = incompleteRecords(df)
+            print(f'\nincomplete: {len(rows)}')
+            if len(rows):
+                print(rows['DRS_ID'].to_string(index=False, header=False))
+            if output:
+                saveTable(rows.set_index('DRS_ID'),
+                          os.path.join(output, 'incomplete' + ext))
+
+
+def my_parser():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog=epilog)
+    parser.add_argument('snapshot',
+                        type=str,
+                        help='snapshot JSON saved by checkCiteComplete.py')
+    parser.add_argument('-b', '--by',
+                        type=str, nargs='+',
+                        choices=drsColumns[1:],
+                        help='keys to summarize by, default=%(default)s',
+                        default=['mip', 'model', 'experiment'])
+    parser.add_argument('--incomplete',
+                        action='store_true',
+                        help='list incomplete records',
+                        default=False)
+    parser.add_argument('-o', '--output',
+                        type=str,
+                        help='directory to save tables',
+                        default=None)
+    parser.add_argument('--parquet',
+                        action='store_true',
+                        help='save tables as Parquet instead of CSV',
+                        default=False)
+    return parser
+
+
+def main(argv=None):
+    parser = my_parser()
+    a = parser.parse_args(argv)
+    if a.parquet and not any(importlib.util.find_spec(m)
+                             for m in parquetEngines):
+        parser.error('--parquet requires pyarrow or fastparquet')
+
+    print(f'Loading from "{a.snapshot}"')
+    df = loadFrame(a.snapshot)
+    if df.empty:
+        print('No records.')
+        return 1
+    printSummary(df, by=a.by, incomplete=a.incomplete,
+                 output=a.output, parquet=a.parquet)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
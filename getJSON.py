@@ -10,12 +10,28 @@ You have to specify MIP(`activity_id`), model(`source_id`),
 institution(`institution_id`), and experiment(`experiment_id`) to get
 info.
 
+Bulk mode: giving several MIPs, models or experiments fetches every
+combination of them in parallel, e.g.
+
+  getJSON.py -a CMIP ScenarioMIP -s MIROC6 -e historical ssp585
+
+A list file (`--list`) can be used instead, each line is
+`mip model [exp]`; lines starting with `#` are ignored.
+
+With --journal, the outcome of each download is recorded as it
+finishes, and a restarted run skips DRS's already downloaded; this
+applies to a single DRS as well.
+
 """
-from utils import getJSON
-import json
+from utils import getJSON, getDRS, dumpJSON
+from journal import Journal
+from metrics import metrics
 # import certifi
 # import urllib3
 import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 __author__ = 'T.Inoue'
 __credits__ = 'Copyright (c) 2019 JAMSTEC'
@@ -45,7 +61,7 @@ def my_parser():
                         help='be verbose.',
                         default=False)
     parser.add_argument('-a', '--mip', '--activity_id',
-                        type=str,
+                        type=str, nargs='+',
                         help='MIP(activity_id)',
                         default=None)
     parser.add_argument('-i', '--inst', '--institution_id',
@@ -53,21 +69,152 @@ def my_parser():
                         help='inst(institution_id),default="%(default)s"',
                         default=institution)
     parser.add_argument('-s', '--model', '--source_id',
-                        type=str,
+                        type=str, nargs='+',
                         help='model(source_id)',
                         default=None)
     parser.add_argument('-e', '--exp', '--experiment_id',
-                        metavar='exp', type=str,
+                        metavar='exp', type=str, nargs='+',
                         help='experiments to submit',
                         default=None)
+    parser.add_argument('--no-cache',
+                        dest='use_cache', action='store_false',
+                        help='do not use local response cache.',
+                        default=True)
+    parser.add_argument('--refresh',
+                        action='store_true',
+                        help='ignore cached data and download again.',
+                        default=False)
+    parser.add_argument('--compact',
+                        action='store_true',
+                        help='write compact JSON for machine use.',
+                        default=False)
+    parser.add_argument('--metrics',
+                        type=str,
+                        help='save request metrics to this file '
+                        '(Prometheus text format if *.prom, else JSON)',
+                        default=None)
+    parser.add_argument('--journal',
+                        type=str,
+                        help='journal file to resume an interrupted run',
+                        default=None)
+    parser.add_argument('-L', '--list',
+                        type=str,
+                        help='file listing "mip model [exp]" per line',
+                        default=None)
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        help='number of parallel downloads in bulk mode, '
+                        'default=%(default)s',
+                        default=8)
 
     return parser
 
 
-def main():
+def readList(fname):
+    """
+    Read (mip, model, exp) tuples from a list file, `exp` may be None.
+
+    Raises ValueError for a line not of 2 or 3 fields.
+    """
+    tasks = []
+    with open(fname) as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].split()
+            if not line:
+                continue
+            if len(line) not in (2, 3):
+                raise ValueError(f'{fname}:{lineno}: expected '
+                                 f'"mip model [exp]", got {len(line)} '
+                                 'fields')
+            if len(line) == 2:
+                line.append(None)
+            tasks.append(tuple(line))
+    return tasks
+
+
+def fetchOne(mip, model, inst, exp, use_cache=True, refresh=False,
+             compact=False):
+    """
+    Get one DRS and save it as `<subject>.json`.
+
+    Returns saved filename, or None if failed.
+    """
+    base = getJSON(source_id=model, activity_id=mip,
+                   institution_id=inst, experiment_id=exp,
+                   use_cache=use_cache, refresh=refresh)
+    if base is None:
+        return None
+    fname = base['subjects'][0]['subject'] + '.json'
+    dumpJSON(base, fname, compact=compact)
+    return fname
+
+
+def bulkFetch(tasks, inst, jobs=8, use_cache=True, refresh=False,
+              compact=False, journal=None):
+    """
+    Fetch (mip, model, exp) `tasks` in parallel with at most `jobs`
+    threads, saving each JSON as it arrives.
+
+    If `journal` is given, tasks done in it are skipped, and outcomes
+    are recorded to it.
+
+    Returns list of failed tasks.
+    """
+    nskip = 0
+    if journal is not None:
+        todo = [t for t in tasks
+                if not journal.isDone(getDRS(t[1], t[0], inst, t[2]))]
+        nskip = len(tasks) - len(todo)
+        tasks = todo
+
+    def fetch(mip, model, exp):
+        try:
+            fname = fetchOne(mip, model, inst, exp,
+                             use_cache, refresh, compact)
+        except Exception as e:
+            print('Error:', (mip, model, exp), e)
+            fname = None
+        if journal is not None:
+            journal.record(getDRS(model, mip, inst, exp),
+                           'failed' if fname is None else 'done',
+                           file=fname)
+        return fname
+
+    failed = []
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(fetch, mip, model, exp): (mip, model, exp)
+                   for mip, model, exp in tasks}
+        for fut in as_completed(futures):
+            task = futures[fut]
+            fname = fut.result()
+            if fname is None:
+                failed.append(task)
+            else:
+                print('Saved to:', fname)
+    elapsed = time.time() - start
+
+    ntask = len(tasks)
+    print('Summary:')
+    if nskip:
+        print(f'  skipped:   {nskip} (done in journal)')
+    print(f'  requested: {ntask}')
+    print(f'  succeeded: {ntask - len(failed)}')
+    print(f'  failed:    {len(failed)}')
+    print(f'  elapsed:   {elapsed:.2f} s '
+          f'({ntask / elapsed if elapsed > 0 else 0:.2f} req/s)')
+    for mip, model, exp in failed:
+        print('  failed:', mip, model, exp)
+    return failed
+
+
+def main(argv=None):
 
     parser = my_parser()
-    a = parser.parse_args()
+    a = parser.parse_args(argv)
+
+    if a.metrics:
+        metrics.dumpAtExit(a.metrics)
 
     if (a.verbose):
         print('Configuration:')
@@ -76,8 +223,30 @@ def main():
         print('  institution:', a.inst)
         print('  experiments:', a.exp)
 
-    base = getJSON(source_id=a.model, activity_id=a.mip,
-                   institution_id=a.inst, experiment_id=a.exp)
+    if a.list:
+        try:
+            tasks = readList(a.list)
+        except ValueError as e:
+            parser.error(str(e))
+    elif a.mip and a.model:
+        tasks = list(itertools.product(a.mip, a.model, a.exp or [None]))
+    else:
+        parser.print_help()
+        exit(1)
+
+    if (a.list or len(tasks) > 1 or a.journal):
+        journal = Journal(a.journal) if a.journal else None
+        failed = bulkFetch(tasks, a.inst, jobs=a.jobs,
+                           use_cache=a.use_cache, refresh=a.refresh,
+                           compact=a.compact, journal=journal)
+        if journal is not None:
+            journal.close()
+        return 1 if failed else 0
+
+    mip, model, exp = tasks[0]
+    base = getJSON(source_id=model, activity_id=mip,
+                   institution_id=a.inst, experiment_id=exp,
+                   use_cache=a.use_cache, refresh=a.refresh)
     if (base is None):
         parser.print_help()
         exit(1)
@@ -90,9 +259,8 @@ def main():
         print('base subject:', base_subject)
 
     fname = base_subject + '.json'
-    with open(fname, 'w') as f:
-        print('Saving base data to:', fname)
-        json.dump(base, f, indent=2)
+    print('Saving base data to:', fname)
+    dumpJSON(base, fname, compact=a.compact)
     print('Done.')
 
     return 0
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Store of content hashes of posted records.
+
+After a record is posted successfully, the SHA-256 of its canonical
+JSON (sorted keys, no whitespace) is stored under the post URL
+(`utils.basePostUrl`) and its subject DRS.  Posting the same content
+to the same server again can then be skipped.
+
+Every script posting records (postJSON.py, pipeline.py, modCreators.py)
+records them here, so that the store follows the latest content posted.
+
+The store is a JSON file, `posted/hashes.json` under `utils.cacheDir`
+by default, out of the directory of the response cache and so never
+evicted by it.
+
+"""
+
+import os
+import json
+import hashlib
+import threading
+import utils
+
+
+def contentHash(data):
+    """
+    Returns SHA-256 hex digest of canonicalized JSON of `data`.
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'),
+                           ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def subjectOf(data):
+    return data['subjects'][0]['subject']
+
+
+def storeKey(data):
+    """
+    Returns key of `data` in the store, the post URL and subject DRS.
+    """
+    return utils.basePostUrl + ' ' + subjectOf(data)
+
+
+class HashStore():
+    """
+    Content hashes of posted records keyed by post URL and subject DRS.
+    """
+
+    def __init__(self, fname=None):
+        self.fname = fname or os.path.join(utils.cacheDir, 'posted',
+                                           'hashes.json')
+        self._lock = threading.Lock()
+        self.hashes = {}
+        try:
+            self.hashes = utils.loadJSON(self.fname)
+        except (OSError, ValueError):
+            pass
+
+    def isUnchanged(self, data):
+        """
+        Returns True if `data` is the same as the one posted last.
+        """
+        return self.hashes.get(storeKey(data)) == contentHash(data)
+
+    def record(self, data):
+        """
+        Record `data` as posted.
+        """
+        digest = contentHash(data)
+        with self._lock:
+            self.hashes[storeKey(data)] = digest
+
+    def save(self):
+        with self._lock:
+            hashes = dict(self.hashes)
+        dirname = os.path.dirname(self.fname)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmpname = f'{self.fname}.{os.getpid()}.tmp'
+        utils.dumpJSON(hashes, tmpname, indent=1)
+        os.replace(tmpname, self.fname)
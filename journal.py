@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Checkpoint journal for resumable bulk jobs.
+
+A journal is a JSON Lines file; each line records the outcome of one
+item of a bulk job as it finishes::
+
+    {"key": "CMIP6.CMIP.MIROC.MIROC6.historical", "status": "done", ...}
+
+When a job is restarted with the same journal, items already recorded
+as ``done`` are skipped, and only failed or pending ones are run again.
+The last line for a key wins.
+
+Writing a line is one buffered append and flush, so the journal costs
+little compared with the requests themselves.
+
+"""
+
+import os
+import json
+import threading
+
+
+class Journal():
+    """
+    Append-only journal of item outcomes, safe to share between threads.
+
+    Use as ``with Journal(fname) as j:``, or call `close()`.
+    """
+
+    def __init__(self, fname, sync=False):
+        self.fname = fname
+        self.sync = sync
+        self.status = {}
+        self._lock = threading.Lock()
+        self.load()
+        self._f = open(fname, 'a')
+
+    def load(self):
+        """
+        Read outcomes recorded so far.  A truncated last line (by a
+        crash) is cut off the file, so that new records start on a line
+        of their own; other lines not valid are ignored.
+        """
+        if not os.path.exists(self.fname):
+            return
+        with open(self.fname, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+        for line in data.splitlines():
+            try:
+                entry = json.loads(line)
+                self.status[entry['key']] = entry['status']
+            except (ValueError, TypeError, KeyError):
+                continue
+
+    def isDone(self, key):
+        return self.status.get(key) == 'done'
+
+    def pending(self, keys):
+        """
+        Returns `keys` not yet done.
+        """
+        return [k for k in keys if not self.isDone(k)]
+
+    def record(self, key, status, **info):
+        """
+        Record outcome `status` (``done`` or ``failed``) of `key`, with
+        optional `info` such as the error message.
+        """
+        entry = dict(key=key, status=status, **info)
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            self.status[key] = status
+            self._f.write(line)
+            self._f.flush()
+            if self.sync:
+                os.fsync(self._f.fileno())
+
+    def counts(self):
+        res = {}
+        for status in self.status.values():
+            res[status] = res.get(status, 0) + 1
+        return res
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
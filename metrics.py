@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Timing and metrics of HTTP requests to the citation service.
+
+Every request made by `utils.Client` (and `aioutils.AsyncClient`) is
+recorded to the shared `metrics` with its latency, response size,
+status and retries, aggregated per endpoint into histograms.
+
+The result can be saved by `metrics.dump(fname)` as JSON, or in
+Prometheus text format if `fname` ends with ``.prom``.  Setting
+environment variable ``CITATIONUTIL_METRICS`` to a filename saves it at
+exit of any script.
+
+"""
+
+import os
+import json
+import bisect
+import atexit
+import threading
+
+latencyBuckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                  1.0, 2.5, 5.0, 10.0, 30.0)
+sizeBuckets = (1024, 4096, 16384, 65536, 262144, 1048576,
+               4194304, 16777216)
+
+
+class Histogram():
+    """
+    Histogram of values with fixed bucket upper bounds.
+    """
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Returns list of (upper bound, cumulative count), the last bound
+        is ``+Inf``.
+        """
+        res = []
+        n = 0
+        for bound, c in zip(self.bounds + (float('inf'),), self.counts):
+            n += c
+            res.append((bound, n))
+        return res
+
+    def quantile(self, q):
+        """
+        Returns upper bound of the bucket containing quantile `q`.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        for bound, n in self.cumulative():
+            if n >= rank:
+                return bound
+        return float('inf')
+
+    def toJSON(self):
+        return {'count': self.count,
+                'sum': self.sum,
+                'p50': self.quantile(0.5),
+                'p99': self.quantile(0.99),
+                'buckets': {_le(b): n for b, n in self.cumulative()}}
+
+
+def _le(bound):
+    if bound == float('inf'):
+        return '+Inf'
+    return repr(bound)
+
+
+class Endpoint():
+    """
+    Statistics of requests to one endpoint.
+    """
+    __slots__ = ('latency', 'size', 'status', 'retries')
+
+    def __init__(self):
+        self.latency = Histogram(latencyBuckets)
+        self.size = Histogram(sizeBuckets)
+        self.status = {}
+        self.retries = 0
+
+
+class Metrics():
+    """
+    Thread-safe collection of request statistics keyed by endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, status, latency, size=None, retries=0):
+        """
+        Record one request; `status` is the HTTP status or ``'error'``
+        if no response was received.
+        """
+        with self._lock:
+            e = self.endpoints.get(endpoint)
+            if e is None:
+                e = self.endpoints[endpoint] = Endpoint()
+            e.latency.add(latency)
+            if size is not None:
+                e.size.add(size)
+            status = str(status)
+            e.status[status] = e.status.get(status, 0) + 1
+            e.retries += retries
+
+    def clear(self):
+        with self._lock:
+            self.endpoints.clear()
+
+    def summary(self):
+        """
+        Returns statistics as a dict.
+        """
+        with self._lock:
+            return {name: {'requests': e.latency.count,
+                           'status': dict(e.status),
+                           'retries': e.retries,
+                           'latency_seconds': e.latency.toJSON(),
+                           'response_bytes': e.size.toJSON()}
+                    for name, e in self.endpoints.items()}
+
+    def prometheus(self, prefix='citationutil'):
+        """
+        Returns statistics in Prometheus text format.
+        """
+        lines = []
+
+        def histogram(name, help, attr):
+            lines.append(f'# HELP {prefix}_{name} {help}')
+            lines.append(f'# TYPE {prefix}_{name} histogram')
+            for ep, e in self.endpoints.items():
+                h = getattr(e, attr)
+                for bound, n in h.cumulative():
+                    lines.append(f'{prefix}_{name}_bucket'
+                                 f'{{endpoint="{ep}",le="{_le(bound)}"}} {n}')
+                lines.append(f'{prefix}_{name}_sum{{endpoint="{ep}"}} {h.sum}')
+                lines.append(f'{prefix}_{name}_count{{endpoint="{ep}"}} '
+                             f'{h.count}')
+
+        with self._lock:
+            lines.append(f'# HELP {prefix}_requests_total '
+                         'Number of HTTP requests.')
+            lines.append(f'# TYPE {prefix}_requests_total counter')
+            for ep, e in self.endpoints.items():
+                for status, n in e.status.items():
+                    lines.append(f'{prefix}_requests_total'
+                                 f'{{endpoint="{ep}",status="{status}"}} {n}')
+            lines.append(f'# HELP {prefix}_retries_total '
+                         'Number of retried HTTP requests.')
+            lines.append(f'# TYPE {prefix}_retries_total counter')
+            for ep, e in self.endpoints.items():
+                lines.append(f'{prefix}_retries_total{{endpoint="{ep}"}} '
+                             f'{e.retries}')
+            histogram('request_duration_seconds',
+                      'HTTP request latency in seconds.', 'latency')
+            histogram('response_size_bytes',
+                      'HTTP response size in bytes.', 'size')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, fname):
+        """
+        Save statistics to `fname`, in Prometheus text format if it ends
+        with ``.prom``, otherwise as JSON.
+        """
+        if fname.endswith('.prom'):
+            text = self.prometheus()
+        else:
+            text = json.dumps(self.summary(), indent=2)
+        with open(fname, 'w') as f:
+            f.write(text)
+
+    def dumpAtExit(self, fname):
+        atexit.register(self.dump, fname)
+
+
+metrics = Metrics()
+
+if os.environ.get('CITATIONUTIL_METRICS'):
+    metrics.dumpAtExit(os.environ['CITATIONUTIL_METRICS'])
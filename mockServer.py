@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Local stand-in of the citation service for testing and benchmarks.
+
+---
+This script serves the same API paths as the citation service:
+
+  GET  /WDCC/ui/cerasearch/cerarest/exportcmip6?input=<DRS>
+  GET  /WDCC/ui/cerasearch/cerarest/cmip6Citations?institutionId=...
+  POST /api/v1/citation[?check=1|test=1|tcheck=1]
+
+Records are synthesized from the requested DRS, and posted records are
+checked for required fields.  Latency and errors can be injected.
+
+To use it from the other scripts, set environment variable
+`CITATIONUTIL_SERVER`, e.g.
+
+  CITATIONUTIL_SERVER=http://localhost:8000 getJSON.py -a CMIP -s MIROC6
+
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+desc, epilog = __doc__.split('---')
+
+getPath = '/WDCC/ui/cerasearch/cerarest/exportcmip6'
+citationsPath = '/WDCC/ui/cerasearch/cerarest/cmip6Citations'
+postPath = '/api/v1/citation'
+
+
+def makeRecord(drs, ncreators=5):
+    """
+    Synthesize a citation record for `drs`.
+    """
+    parts = drs.split('.')
+    title = ' '.join(parts[2:4]) + ' model output prepared for CMIP6 ' \
+        + ' '.join(parts[1:2] + parts[4:])
+    creators = []
+    for i in range(ncreators):
+        creators.append({'affiliation': f'{parts[2]} Institute {i}',
+                         'creatorName': f'Family{i}, Given{i}',
+                         'email': f'given{i}@example.org',
+                         'familyName': f'Family{i}',
+                         'givenName': f'Given{i}'})
+    data = {'creators': creators,
+            'titles': [title],
+            'publisher': 'Earth System Grid Federation',
+            'publicationYear': '2019',
+            'subjects': [{'subject': drs,
+                          'schemeURI': 'http://github.com/WCRP-CMIP/CMIP6_CVs',
+                          'subjectScheme': 'DRS'}],
+            'relatedIdentifiers': [
+                {'relatedIdentifier': '10.5194/gmd-12-2727-2019',
+                 'relatedIdentifierType': 'DOI',
+                 'relationType': 'IsDocumentedBy'}]}
+    if len(parts) == 4:
+        num = int(hashlib.md5(drs.encode()).hexdigest()[:4], 16)
+        data['identifier'] = {'id': f'10.22033/ESGF/CMIP6.{num}',
+                              'identifierType': 'DOI'}
+    return data
+
+
+def makeCitations(query, nrecords=100):
+    """
+    Synthesize cmip6Citations response for `query`.
+    """
+    inst = query.get('institutionId', 'MIROC')
+    model = query.get('sourceId', 'MIROC6')
+    docs = []
+    for i in range(nrecords):
+        drs = f'CMIP6.MIP{i % 7}.{inst}.{model}.exp{i:04d}'
+        docs.append({'DRS_ID': drs,
+                     'CITATION_COMPLETED': 'true' if i % 3 else 'false'})
+    if 'drsId' in query:
+        docs = [d for d in docs if d['DRS_ID'].startswith(query['drsId'])]
+    if 'complete' in query:
+        c = query['complete'].lower()
+        docs = [d for d in docs if d['CITATION_COMPLETED'] == c]
+    return docs
+
+
+def checkRecord(data):
+    """
+    Returns error message for posted `data`, or None if ok.
+    """
+    if not isinstance(data, dict):
+        return 'record must be a JSON object'
+    for key in ('titles', 'subjects', 'creators'):
+        if not data.get(key):
+            return f'missing required field: {key}'
+    for c in data['creators']:
+        if not c.get('creatorName'):
+            return 'creatorName is required for all creators'
+    return None
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def reply(self, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def inject(self):
+        """
+        Sleep for configured latency; returns True if an error should be
+        injected.
+        """
+        srv = self.server
+        if srv.latency > 0:
+            time.sleep(random.uniform(0.5, 1.5) * srv.latency)
+        if srv.error_rate > 0 and random.random() < srv.error_rate:
+            self.reply(srv.error_status, {'error': 'injected error'})
+            return True
+        return False
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if self.inject():
+            return
+
+        if url.path == getPath:
+            drs = query.get('input', '')
+            if not drs.startswith('CMIP6.') or len(drs.split('.')) < 4:
+                self.reply(404, {'error': f'No data found for "{drs}"'})
+                return
+            etag = '"' + hashlib.md5(drs.encode()).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.reply(200, makeRecord(drs, self.server.ncreators),
+                       {'ETag': etag})
+        elif url.path == citationsPath:
+            self.reply(200, makeCitations(query, self.server.nrecords))
+        else:
+            self.reply(404, {'error': f'Not found: {url.path}'})
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        if self.inject():
+            return
+
+        if url.path != postPath:
+            self.reply(404, {'error': f'Not found: {url.path}'})
+            return
+        if not self.headers.get('Authorization'):
+            self.reply(401, {'error': 'authorization required'})
+            return
+        try:
+            data = json.loads(body.decode('utf-8'))
+        except ValueError as e:
+            self.reply(400, {'error': f'invalid JSON: {e}'})
+            return
+        err = checkRecord(data)
+        if err:
+            self.reply(400, {'error': err})
+            return
+        subject = data['subjects'][0].get('subject')
+        if 'check' in query or 'tcheck' in query:
+            self.reply(200, {'message': f'check OK: {subject}'})
+        elif 'test' in query:
+            self.reply(200, {'message': f'test OK: {subject}'})
+        else:
+            self.reply(200, {'message': f'posted: {subject}'})
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('localhost', 0), latency=0.0,
+                 error_rate=0.0, error_status=500, nrecords=100,
+                 ncreators=5, verbose=False):
+        super().__init__(address, Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.nrecords = nrecords
+        self.ncreators = ncreators
+        self.verbose = verbose
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """
+        Serve in a background thread.
+        """
+        t = threading.Thread(target=self.serve_forever, daemon=True)
+        t.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def my_parser():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog=epilog, )
+    parser.add_argument('-v', '--verbose',
+                        dest='verbose', action='store_true',
+                        help='log each request.',
+                        default=False)
+    parser.add_argument('--host',
+                        type=str,
+                        help='host to bind, default="%(default)s"',
+                        default='localhost')
+    parser.add_argument('-p', '--port',
+                        type=int,
+                        help='port to listen, default=%(default)s',
+                        default=8000)
+    parser.add_argument('-l', '--latency',
+                        type=float,
+                        help='mean latency in seconds, default=%(default)s',
+                        default=0.0)
+    parser.add_argument('-e', '--error_rate',
+                        type=float,
+                        help='fraction of requests answered with error, '
+                        'default=%(default)s',
+                        default=0.0)
+    parser.add_argument('--error_status',
+                        type=int,
+                        help='status of injected errors, default=%(default)s',
+                        default=500)
+    parser.add_argument('-n', '--nrecords',
+                        type=int,
+                        help='number of records of cmip6Citations, '
+                        'default=%(default)s',
+                        default=100)
+    return parser
+
+
+def main():
+    a = my_parser().parse_args()
+
+    server = MockServer((a.host, a.port), latency=a.latency,
+                        error_rate=a.error_rate,
+                        error_status=a.error_status,
+                        nrecords=a.nrecords, verbose=a.verbose)
+    print('Serving on:', server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
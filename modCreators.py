@@ -7,15 +7,32 @@ Modify "Creators" in CMIP6 Citation info JSON file.
 This script reads and modifies "Creators" in Citaion info JSON file.
 New list is read from an excel file,
 
+The excel file is parsed once into an index of creators keyed by (MIP,
+experiment), and the index is saved to a sidecar file
+`<excelfile>.index.json`.  Following runs use this index as long as
+the excel file is not modified.
+
+Many JSON files or directories can be given at once; the excel file
+is loaded only once, and the files are modified, saved and/or
+checked/posted concurrently.  A summary table of changed files is
+printed at the end.  With --journal, a restarted run skips files
+already done with the same actions (check, save and/or post).
+Records posted by --do_post are recorded in the store of posted
+records (see hashStore.py), as postJSON.py does.
+
 The JSON file can be obtained by getJSON.py, etc.
 """
 
-from utils import loadJSON, postJSON, Creator
-import json
+from utils import loadJSON, postJSON, sendJSON, errorMessage, creatorRegistry
+from utils import expandFiles, dumpJSON
+import os
+import hashlib
 import argparse
 from copy import deepcopy
-import pandas as pd
 from pprint import pprint
+from concurrent.futures import ThreadPoolExecutor
+from journal import Journal
+from hashStore import HashStore
 
 __author__ = 'T.Inoue'
 __credits__ = 'Copyright (c) 2019 JAMSTEC'
@@ -44,9 +61,25 @@ def my_parser():
                         help='Do POST modified JSON',
                         default=False)
 
-    parser.add_argument('jsonfile',
+    parser.add_argument('--no-cache',
+                        dest='use_cache', action='store_false',
+                        help='do not use sidecar index of excel file.',
+                        default=True)
+
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        help='number of files processed concurrently, '
+                        'default=%(default)s',
+                        default=4)
+
+    parser.add_argument('--journal',
                         type=str,
-                        help='json file to be modified')
+                        help='journal file to resume an interrupted run',
+                        default=None)
+
+    parser.add_argument('jsonfile',
+                        type=str, nargs='+',
+                        help='json files or directories to be modified')
 
     parser.add_argument('excelfile',
                         type=str,
@@ -55,44 +88,267 @@ def my_parser():
     return parser
 
 
-def loadCreators(xlsfile, mip, exp):
-    if exp:
-        df = pd.read_excel(xlsfile, sheet_name='Exp')
-    else:
-        df = pd.read_excel(xlsfile, sheet_name='MIP')
-
-    if exp == None:
-        exp = 'NaN'
-
-    q_str = f"MIP == '{mip}' and experiment == '{exp}'"
-    print(q_str)
-    l = df.query(q_str)
-    c_list = l['creators'].values[0].split('\n')
+def parseCreators(text):
+    """
+    Parse creators text in the excel file, each line is
+    ``full name, email, affiliation``.
 
+    Returns list of creators in JSON form, identical creators are shared
+    via `utils.creatorRegistry`.
+    """
     creators = []
-    # print(len(c_list))
-    for c_txt in c_list:
-        print(c_txt)
+    for c_txt in text.split('\n'):
+        if not c_txt.strip():
+            continue
         fullname, email, aff = [x.strip() for x in c_txt.split(',',2)]
-        # print(f'"{fullname}"\t"{email}"\t "{aff}"')
-        creators.append(
-            Creator(fullName=fullname, email=email, affiliation=aff).toJSON())
-
+        creators.append(creatorRegistry.toJSON(
+            creatorRegistry.get(fullName=fullname, email=email,
+                                affiliation=aff)))
     return creators
 
 
-def main():
+def buildCreatorIndex(xlsfile):
+    """
+    Parse 'MIP' and 'Exp' sheets of `xlsfile`.
+
+    Returns dict of creators list keyed by (mip, exp), where `exp` is
+    None for the 'MIP' sheet.
+    """
+    import pandas as pd
+
+    def isnan(v):
+        return pd.isna(v) or str(v) == 'NaN'
+
+    index = {}
+    for sheet in ('MIP', 'Exp'):
+        df = pd.read_excel(xlsfile, sheet_name=sheet)
+        for row in df.to_dict('records'):
+            exp = row.get('experiment')
+            if sheet == 'MIP':
+                if not isnan(exp):
+                    continue
+                exp = None
+            elif isnan(exp):
+                continue
+            key = (row['MIP'], exp)
+            if key in index or isnan(row['creators']):
+                continue
+            index[key] = parseCreators(row['creators'])
+    return index
+
+
+def fileHash(fname):
+    h = hashlib.sha256()
+    with open(fname, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024*1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def saveCreatorIndex(index, cachefile, st, digest):
+    cache = {'mtime': st.st_mtime,
+             'size': st.st_size,
+             'sha256': digest,
+             'entries': [{'MIP': mip, 'experiment': exp, 'creators': c}
+                         for (mip, exp), c in index.items()]}
+    tmpname = f'{cachefile}.{os.getpid()}.tmp'
+    dumpJSON(cache, tmpname, compact=True)
+    os.replace(tmpname, cachefile)
+
+
+def loadCreatorIndex(xlsfile, use_cache=True):
+    """
+    Returns index of creators of `xlsfile`, see buildCreatorIndex().
+
+    The index is cached in `<xlsfile>.index.json`, which is used while
+    mtime and size of `xlsfile` are unchanged, or its content hash is
+    the same.
+    """
+    cachefile = xlsfile + '.index.json'
+    st = os.stat(xlsfile)
+    digest = None
+
+    if use_cache:
+        try:
+            cache = loadJSON(cachefile)
+        except (OSError, ValueError):
+            cache = None
+        if cache is not None:
+            valid = (cache['mtime'] == st.st_mtime
+                     and cache['size'] == st.st_size)
+            if not valid:
+                digest = fileHash(xlsfile)
+                valid = (cache['sha256'] == digest)
+            if valid:
+                index = {(e['MIP'], e['experiment']):
+                         [creatorRegistry.internJSON(c) for c in e['creators']]
+                         for e in cache['entries']}
+                if digest is not None:
+                    # touched but not modified, refresh mtime.
+                    try:
+                        saveCreatorIndex(index, cachefile, st, digest)
+                    except OSError as e:
+                        print('Warning: can not save index:', e)
+                return index
+
+    index = buildCreatorIndex(xlsfile)
+    if digest is None:
+        digest = fileHash(xlsfile)
+    try:
+        saveCreatorIndex(index, cachefile, st, digest)
+    except OSError as e:
+        print('Warning: can not save index:', e)
+    return index
+
+
+def loadCreators(xlsfile, mip, exp, use_cache=True):
+    """
+    Returns creators list for (`mip`, `exp`) in `xlsfile`, or None if
+    not found.
+    """
+    index = loadCreatorIndex(xlsfile, use_cache=use_cache)
+    print(f"MIP == '{mip}' and experiment == '{exp}'")
+    return index.get((mip, exp))
+
+
+def subjectInfo(data):
+    """
+    Returns (mip, model, exp) from `subjects[0].subject` of `data`,
+    `exp` is None for MIP-granularity data.
+    """
+    subject = data['subjects'][0]['subject']
+    ( era, mip, inst, model ) = subject.split('.', 3)
+    try:
+        (model, exp) = model.split('.')
+    except ValueError:
+        exp = None
+    return mip, model, exp
+
+
+def modifyFile(fname, index, save=False, post=False, store=None):
+    """
+    Replace creators of JSON file `fname` by those in `index`, then
+    save it and/or post it.  Without `save` nor `post`, check only.
+    A record posted successfully is recorded to `store` if given.
+
+    Returns result as a dict for the summary table.
+    """
+    res = {'file': fname, 'subject': None, 'changed': False,
+           'status': None, 'error': None}
+    try:
+        orig_json = loadJSON(fname)
+        res['subject'] = orig_json['subjects'][0]['subject']
+        mip, model, exp = subjectInfo(orig_json)
+    except Exception as e:
+        res['error'] = str(e)
+        return res
+
+    new_creators = index.get((mip, exp))
+    if new_creators is None:
+        res['error'] = f'creators not found for ({mip}, {exp})'
+        return res
+    res['changed'] = (new_creators != orig_json['creators'])
+
+    new_json = dict(orig_json)
+    new_json['creators'] = new_creators
+
+    if save and res['changed']:
+        dumpJSON(new_json, fname, indent=4)
+    if post or not save:
+        extra = '' if post else 'check'
+        status, body = sendJSON(new_json, extra)
+        res['status'] = status
+        if status is None:
+            res['error'] = str(body)
+        elif status != 200:
+            res['error'] = str(errorMessage(body))
+        elif post and store is not None:
+            store.record(new_json)
+    return res
+
+
+def journalAction(save=False, post=False):
+    """
+    Returns action name of modifyFile() used in journal keys.
+    """
+    actions = [a for a, on in (('save', save), ('post', post)) if on]
+    return '+'.join(actions) or 'check'
+
+
+def modifyFiles(files, index, save=False, post=False, jobs=4,
+                journal=None, store=None):
+    """
+    Apply modifyFile() to `files` concurrently.  Outcomes are recorded
+    to `journal` if given, keyed by ``<action>:<file>`` (see
+    journalAction()).
+
+    Returns list of results in the same order as `files`.
+    """
+    action = journalAction(save, post)
+
+    def modify(fname):
+        r = modifyFile(fname, index, save=save, post=post, store=store)
+        if journal is not None:
+            journal.record(f'{action}:{fname}',
+                           'failed' if r['error'] else 'done',
+                           changed=r['changed'], error=r['error'])
+        return r
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(modify, files))
+
+
+def printSummary(results):
+    print('Summary:')
+    width = max([len(r['file']) for r in results] + [4])
+    print(f'  {"file":{width}}  changed  status  error')
+    for r in results:
+        changed = 'yes' if r['changed'] else 'no'
+        status = '-' if r['status'] is None else r['status']
+        print(f'  {r["file"]:{width}}  {changed:7}  {status!s:6}  '
+              f'{r["error"] or ""}')
+    nchanged = len([r for r in results if r['changed']])
+    nfailed = len([r for r in results if r['error']])
+    print(f'  {len(results)} files, {nchanged} changed, {nfailed} failed.')
+
+
+def main(argv=None):
     parser = my_parser()
-    a = parser.parse_args()
+    a = parser.parse_args(argv)
+
+    files = expandFiles(a.jsonfile)
 
     if (a.verbose):
         print('Configuration:')
-        print('  JSON file:',a.jsonfile)
+        print('  JSON file:',files)
         print('  Save:',a.save)
         print('  Excel file:',a.excelfile)
         print('  DoPost:', a.post)
 
-    orig_json = loadJSON(a.jsonfile)
+    if len(files) > 1 or a.journal:
+        journal = None
+        if a.journal:
+            journal = Journal(a.journal)
+            action = journalAction(a.save, a.post)
+            todo = [f for f in files
+                    if not journal.isDone(f'{action}:{f}')]
+            if len(todo) < len(files):
+                print(f'Skipping {len(files) - len(todo)} files '
+                      'done in journal.')
+            files = todo
+        store = HashStore() if a.post else None
+        index = loadCreatorIndex(a.excelfile, use_cache=a.use_cache)
+        results = modifyFiles(files, index, save=a.save, post=a.post,
+                              jobs=a.jobs, journal=journal, store=store)
+        if journal is not None:
+            journal.close()
+        if store is not None:
+            store.save()
+        printSummary(results)
+        return 1 if any(r['error'] for r in results) else 0
+
+    jsonfile = files[0]
+    orig_json = loadJSON(jsonfile)
     orig_creators = orig_json['creators']
     print('Original creators:')
     for c in orig_creators:
@@ -101,11 +357,7 @@ def main():
     # pprint(orig_json.keys())
     subject = orig_json['subjects'][0]['subject']
     title = orig_json['titles'][0]
-    ( era, mip, inst, model ) = subject.split('.', 3)
-    try:
-        (model, exp) = model.split('.')
-    except ValueError:
-        exp = None
+    mip, model, exp = subjectInfo(orig_json)
 
     print('Loaded JSON:')
     print('  subject:', subject)
@@ -114,7 +366,10 @@ def main():
     print('  model:', model)
     print('  exp:', exp)
 
-    new_creators = loadCreators(a.excelfile, mip, exp)
+    new_creators = loadCreators(a.excelfile, mip, exp, use_cache=a.use_cache)
+    if new_creators is None:
+        print('Creators not found in:', a.excelfile)
+        return 1
     print('New creators:')
     for c in new_creators:
         print(f"+ {c['creatorName']}\t{c['email']}\t{c['affiliation']}")
@@ -128,11 +383,14 @@ def main():
         extra = 'check'
 
     if (a.save):
-        with open(a.jsonfile, 'w') as f:
-            json.dump(new_json, f, indent=4)
-    else:
+        dumpJSON(new_json, jsonfile, indent=4)
+    if (a.post or not a.save):
         status = postJSON(new_json, extra)
         print(status)
+        if a.post and status == 200:
+            store = HashStore()
+            store.record(new_json)
+            store.save()
 
 
     return 0
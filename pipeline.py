@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Create, check and post CMIP6 Citation info in one run.
+
+---
+This script chains the steps of getJSON.py, addExperiments.py,
+modCreators.py, addReference.py and postJSON.py on in-memory records:
+
+  1. get base (MIP-granularity) info once,
+  2. expand it to given experiments,
+  3. replace creators by the excel file (--excel),
+  4. add reference DOIs (--reference),
+  5. validate records locally (see validateJSON.py), unless
+     --no-validate is given,
+  6. check valid records, and post passed ones (--do_post).
+
+With --do_post, records not changed since last post (see hashStore.py)
+are skipped, unless --force is given.
+
+No JSON file is written unless --save (final records) or
+--save_intermediate (records of every step) is given.
+
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from utils import loadJSON, getJSON, sendJSON, errorMessage, dumpJSON
+from addExperiments import addExperiment
+from addReference import addReferences
+from modCreators import loadCreatorIndex, subjectInfo
+from validateJSON import checkRecord
+from metrics import metrics
+from hashStore import HashStore
+
+mip = 'CMIP'
+model = 'MIROC6'
+inst = 'MIROC'
+
+desc, epilog = __doc__.split('---')
+
+
+def my_parser():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog=epilog, )
+    parser.add_argument('-v', '--verbose',
+                        dest='verbose', action='store_true',
+                        help='be verbose.',
+                        default=False)
+    parser.add_argument('experiments',
+                        metavar='exp', type=str, nargs='*',
+                        help='experiments to submit, '
+                        'MIP-granularity info if none')
+    parser.add_argument('-a', '--mip', '--activity_id',
+                        type=str,
+                        help='MIP(activity_id)',
+                        default=mip)
+    parser.add_argument('-i', '--inst', '--institution_id',
+                        type=str,
+                        help='institution(institution_id)',
+                        default=inst)
+    parser.add_argument('-s', '--model', '--source_id',
+                        type=str,
+                        help='model(source_id)',
+                        default=model)
+    parser.add_argument('-l', '--loadfile',
+                        type=str,
+                        help='Load base JSON from local file',
+                        default=None)
+    parser.add_argument('-x', '--excel',
+                        type=str,
+                        help='excel file of creators list',
+                        default=None)
+    parser.add_argument('-r', '--reference',
+                        type=str, action='append',
+                        help='reference(DOI) to add, may be repeated',
+                        default=None)
+    parser.add_argument('--do_post',
+                        dest='post', action='store_true',
+                        help='do post JSON.',
+                        default=False)
+    parser.add_argument('-f', '--force',
+                        action='store_true',
+                        help='post even if not changed since last post.',
+                        default=False)
+    parser.add_argument('--no-validate',
+                        dest='validate', action='store_false',
+                        help='do not validate records locally before check.',
+                        default=True)
+    parser.add_argument('--save',
+                        type=str, nargs='?', const='.',
+                        help='save final JSON files to this directory',
+                        default=None)
+    parser.add_argument('--save_intermediate',
+                        type=str,
+                        help='save JSON files of each step to '
+                        'subdirectories of this directory',
+                        default=None)
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        help='number of concurrent requests, '
+                        'default=%(default)s',
+                        default=4)
+    parser.add_argument('--metrics',
+                        type=str,
+                        help='save request metrics to this file '
+                        '(Prometheus text format if *.prom, else JSON)',
+                        default=None)
+    parser.add_argument('--no-cache',
+                        dest='use_cache', action='store_false',
+                        help='do not use local response cache.',
+                        default=True)
+    parser.add_argument('--refresh',
+                        action='store_true',
+                        help='ignore cached data and download again.',
+                        default=False)
+    return parser
+
+
+def saveRecords(records, dirname):
+    """
+    Save `records` as `<dirname>/<subject>.json`.
+    """
+    os.makedirs(dirname, exist_ok=True)
+    for data in records:
+        fname = os.path.join(dirname,
+                             data['subjects'][0]['subject'] + '.json')
+        dumpJSON(data, fname)
+
+
+def expandStep(base, experiments):
+    if not experiments:
+        return [base]
+    return [addExperiment(base, exp) for exp in experiments]
+
+
+def creatorsStep(records, index):
+    """
+    Replace creators of `records` by those in `index`.
+    """
+    res = []
+    for data in records:
+        mip, model, exp = subjectInfo(data)
+        creators = index.get((mip, exp))
+        if creators is None:
+            print(f'Creators not found for ({mip}, {exp}), not changed.')
+        else:
+            data = dict(data)
+            data['creators'] = creators
+        res.append(data)
+    return res
+
+
+def referencesStep(records, references):
+    res = []
+    for data in records:
+        new_data, added, skipped = addReferences(data, references)
+        print(f"  {data['subjects'][0]['subject']}: "
+              f"{len(added)} references added, {len(skipped)} skipped")
+        res.append(data if new_data is None else new_data)
+    return res
+
+
+def submitStep(records, extra, jobs=4):
+    """
+    Post `records` concurrently.
+
+    Returns list of (subject, status, error) in the same order.
+    """
+    def submit(data):
+        status, body = sendJSON(data, extra=extra)
+        if status is None:
+            error = str(body)
+        elif status != 200:
+            error = str(errorMessage(body))
+        else:
+            error = None
+        return data['subjects'][0]['subject'], status, error
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(submit, records))
+
+
+def printResults(results):
+    for subject, status, error in results:
+        print(f'  {subject}: {status} {error or "OK"}')
+
+
+def main(argv=None):
+
+    parser = my_parser()
+    a = parser.parse_args(argv)
+
+    if a.metrics:
+        metrics.dumpAtExit(a.metrics)
+
+    if (a.verbose):
+        print('Configuration:')
+        print('  model:', a.model)
+        print('  mip:', a.mip)
+        print('  institution:', a.inst)
+        print('  experiments:', a.experiments)
+        print('  loadfile:', a.loadfile)
+        print('  excel:', a.excel)
+        print('  references:', a.reference)
+        print('  do_post:', a.post)
+
+    def intermediate(step, records):
+        if a.save_intermediate:
+            saveRecords(records, os.path.join(a.save_intermediate, step))
+
+    start = time.time()
+    if (a.loadfile is None):
+        base = getJSON(source_id=a.model, activity_id=a.mip,
+                       institution_id=a.inst,
+                       use_cache=a.use_cache, refresh=a.refresh)
+    else:
+        base = loadJSON(a.loadfile)
+    if (base is None):
+        return 1
+    intermediate('base', [base])
+
+    records = expandStep(base, a.experiments)
+    intermediate('experiments', records)
+
+    if a.excel:
+        index = loadCreatorIndex(a.excel)
+        records = creatorsStep(records, index)
+        intermediate('creators', records)
+
+    if a.reference:
+        print('Adding references:')
+        records = referencesStep(records, a.reference)
+        intermediate('references', records)
+
+    if a.save is not None:
+        saveRecords(records, a.save)
+
+    store = None
+    unchanged = []
+    if a.post:
+        store = HashStore()
+        if not a.force:
+            unchanged = [data for data in records
+                         if store.isUnchanged(data)]
+            for data in unchanged:
+                print(f"  {data['subjects'][0]['subject']}: "
+                      "not changed since last post, skipped.")
+            records = [data for data in records
+                       if not store.isUnchanged(data)]
+
+    valid = []
+    failed = []
+    for data in records:
+        errors = []
+        if a.validate:
+            errors, warnings = checkRecord(data)
+            for w in warnings:
+                print(f"  {data['subjects'][0]['subject']}: warning: {w}")
+        if errors:
+            failed.append((data['subjects'][0]['subject'], None,
+                           '; '.join(errors)))
+        else:
+            valid.append(data)
+    if failed:
+        print('Validation failed:')
+        printResults(failed)
+
+    print('Checking:')
+    results = submitStep(valid, 'check', jobs=a.jobs)
+    printResults(results)
+    passed = [data for data, (subject, status, error)
+              in zip(valid, results) if error is None]
+    failed += [r for r in results if r[2] is not None]
+
+    if a.post and passed:
+        print('Posting:')
+        posted = submitStep(passed, None, jobs=a.jobs)
+        printResults(posted)
+        failed += [r for r in posted if r[2] is not None]
+        for data, (subject, status, error) in zip(passed, posted):
+            if error is None:
+                store.record(data)
+        store.save()
+
+    print('Summary:')
+    if unchanged:
+        print(f'  unchanged: {len(unchanged)} '
+              f'({2 * len(unchanged)} requests avoided)')
+    print(f'  records: {len(records)}')
+    print(f'  passed:  {len(passed)}')
+    print(f'  failed:  {len(failed)}')
+    print(f'  elapsed: {time.time() - start:.2f} s')
+    print('Done.')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    exit(main())
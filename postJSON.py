@@ -10,12 +10,32 @@ The JSON file can be obtained by getJSON.py, etc.
 
 Without --do_post option, only check is done.
 
+Many files, directories (all `*.json` in it) and glob patterns can be
+given.  All files are checked concurrently first, then with --do_post
+only the files passed the check are posted.  Use --report to save the
+result of each request as a JSON file.
+
+With --journal, the outcome of each file is recorded as it finishes,
+and a restarted run skips files already checked (or posted with
+--do_post).
+
+With --do_post, files whose content is the same as posted last time
+(see hashStore.py) are skipped, unless --force is given.
+
+Files are validated locally (see validateJSON.py) before the check,
+and those failed are not sent; use --no-validate to skip it.
 
 """
 
-from utils import loadJSON, postJSON
+from utils import loadJSON, sendJSON, errorMessage, expandFiles
+from validateJSON import checkRecord
+from metrics import metrics
+from journal import Journal
+from hashStore import HashStore
+import time
 import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 __author__ = 'T.Inoue'
 __credits__ = 'Copyright (c) 2019 JAMSTEC'
@@ -39,33 +59,216 @@ def my_parser():
                         help='do post JSON.',
                         default=False)
 
-    parser.add_argument('jsonfile',
+    parser.add_argument('-f', '--force',
+                        action='store_true',
+                        help='post even if not changed since last post.',
+                        default=False)
+
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        help='number of concurrent requests, '
+                        'default=%(default)s',
+                        default=4)
+
+    parser.add_argument('--no-validate',
+                        dest='validate', action='store_false',
+                        help='do not validate files locally before check.',
+                        default=True)
+
+    parser.add_argument('--metrics',
+                        type=str,
+                        help='save request metrics to this file '
+                        '(Prometheus text format if *.prom, else JSON)',
+                        default=None)
+    parser.add_argument('--journal',
                         type=str,
-                        help='filename to submit')
+                        help='journal file to resume an interrupted run',
+                        default=None)
+    parser.add_argument('-r', '--report',
+                        type=str,
+                        help='save results of each request to this file',
+                        default=None)
+
+    parser.add_argument('jsonfile',
+                        type=str, nargs='+',
+                        help='filename, directory or glob pattern to submit')
 
     return parser
 
 
-def main():
+def postFile(fname, extra, store=None):
+    """
+    Load and post one JSON file.  If posted successfully, its content
+    hash is recorded to `store` if given.
+
+    Returns result as a dict for the report.
+    """
+    res = {'file': fname,
+           'action': 'check' if extra == 'check' else 'post'}
+    start = time.time()
+    try:
+        data = loadJSON(fname)
+        status, body = sendJSON(data, extra=extra)
+    except Exception as e:
+        status, body = None, e
+    res['latency'] = round(time.time() - start, 3)
+    res['status'] = status
+    if status is None:
+        res['error'] = str(body)
+    elif status != 200:
+        res['error'] = str(errorMessage(body))
+    else:
+        res['error'] = None
+        if store is not None and extra is None:
+            store.record(data)
+    return res
+
+
+def validateFiles(files):
+    """
+    Validate `files` locally.
+
+    Returns tuple of (passed files, results of failed files).
+    """
+    passed = []
+    failed = []
+    for fname in files:
+        start = time.time()
+        try:
+            errors, warnings = checkRecord(loadJSON(fname))
+        except Exception as e:
+            errors, warnings = [str(e)], []
+        for w in warnings:
+            print(f'  {fname}: warning: {w}')
+        if errors:
+            print(f"  {fname}: validate failed: {'; '.join(errors)}")
+            failed.append({'file': fname, 'action': 'validate',
+                           'latency': round(time.time() - start, 3),
+                           'status': None, 'error': '; '.join(errors)})
+        else:
+            passed.append(fname)
+    return passed, failed
+
+
+def postFiles(files, extra, jobs=4, journal=None, store=None):
+    """
+    Post `files` concurrently with at most `jobs` requests at a time.
+    Outcomes are recorded to `journal` if given, keyed by
+    ``<action>:<file>``.
+
+    Returns list of results in the same order as `files`.
+    """
+    def post(fname):
+        r = postFile(fname, extra, store=store)
+        if journal is not None:
+            journal.record(f"{r['action']}:{fname}",
+                           'failed' if r['error'] else 'done',
+                           status=r['status'], error=r['error'])
+        return r
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(post, files))
+    for r in results:
+        if r['error'] is None:
+            print(f"  {r['file']}: {r['action']} OK")
+        else:
+            print(f"  {r['file']}: {r['action']} failed "
+                  f"({r['status']}): {r['error']}")
+    return results
+
+
+def unchangedFiles(files, store):
+    """
+    Returns list of `files` whose content is the same as posted last.
+    """
+    res = []
+    for fname in files:
+        try:
+            if store.isUnchanged(loadJSON(fname)):
+                res.append(fname)
+        except Exception:
+            pass
+    return res
+
+
+def main(argv=None):
 
     parser = my_parser()
-    a = parser.parse_args()
+    a = parser.parse_args(argv)
+
+    if a.metrics:
+        metrics.dumpAtExit(a.metrics)
+
+    files = expandFiles(a.jsonfile)
+
+    journal = None
+    nskip = 0
+    if a.journal:
+        journal = Journal(a.journal)
+        action = 'post' if a.post else 'check'
+        todo = [f for f in files if not journal.isDone(f'{action}:{f}')]
+        nskip = len(files) - len(todo)
+        files = todo
+
+    store = None
+    unchanged = []
+    if a.post:
+        store = HashStore()
+        if not a.force:
+            unchanged = unchangedFiles(files, store)
+            for f in unchanged:
+                print(f'  {f}: not changed since last post, skipped.')
+            unchanged_set = set(unchanged)
+            files = [f for f in files if f not in unchanged_set]
 
     if (a.verbose):
         print('Configuration:')
         print('  do_post:',a.post)
-        print('  JSON file:',a.jsonfile)
+        print('  jobs:',a.jobs)
+        print('  JSON files:',files)
+
+    results = []
+    if a.validate:
+        print('Validating:')
+        valid, results = validateFiles(files)
+    else:
+        valid = files
+
+    print('Checking:')
+    results += postFiles(valid, 'check', jobs=a.jobs, journal=journal)
+    passed = [r['file'] for r in results
+              if r['action'] == 'check' and r['error'] is None]
 
-    d = loadJSON(a.jsonfile)
+    if a.post and passed:
+        print('Posting:')
+        results += postFiles(passed, None, jobs=a.jobs, journal=journal,
+                             store=store)
+        store.save()
 
+    failed = [r for r in results if r['error'] is not None]
+    if journal is not None:
+        journal.close()
+
+    print('Summary:')
+    if nskip:
+        print(f'  skipped: {nskip} (done in journal)')
+    if unchanged:
+        print(f'  unchanged: {len(unchanged)} '
+              f'({2 * len(unchanged)} requests avoided)')
+    print(f'  files:   {len(files)}')
+    print(f'  passed:  {len(passed)}')
     if a.post:
-        extra = None
-    else:
-        extra = 'check'
-    status = postJSON(d, extra=extra)
+        posted = [r for r in results
+                  if r['action'] == 'post' and r['error'] is None]
+        print(f'  posted:  {len(posted)}')
+    print(f'  failed:  {len(failed)}')
 
+    if a.report:
+        with open(a.report, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Report saved to "{a.report}"')
 
-    return 0
+    return 1 if failed else 0
 
 if __name__ == '__main__':
     exit(main())
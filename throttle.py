@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Client-side rate limit and adaptive concurrency per host.
+
+Every request made by `utils.Client` (and `aioutils.AsyncClient`) first
+takes a slot of the `Throttle` of its host:
+
+- a token bucket limits the request rate to `defaultRate` per second,
+  with bursts up to `defaultBurst` requests,
+- the number of requests in flight is limited to `limit` (from
+  `initialConcurrency` within `minConcurrency`..`maxConcurrency`), which is
+  adjusted AIMD style: increased by one per `limit` healthy responses,
+  and halved on 429, 5xx, connection errors or latency rising to
+  `latencyFactor` times its usual value (at most once per round trip).
+
+A 429 or 503 response with ``Retry-After`` also pauses the bucket.
+Settings below apply to throttles created after they are changed; the
+rate can also be set by environment variable ``CITATIONUTIL_RATE``
+(0 for no limit).
+
+"""
+
+import os
+import time
+import threading
+import urllib.parse
+
+# requests per second, 0 for no limit
+defaultRate = float(os.environ.get('CITATIONUTIL_RATE', 20.0))
+defaultBurst = 20       # requests
+initialConcurrency = 4
+minConcurrency = 1
+maxConcurrency = 10
+latencyFactor = 3.0
+
+
+class TokenBucket():
+    """
+    Token bucket of `rate` tokens per second up to `burst`.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token, and returns seconds to wait before using it.
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            if now > self.last:
+                self.tokens = min(self.burst,
+                                  self.tokens + (now - self.last) * self.rate)
+                self.last = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return self.last - now - self.tokens / self.rate
+
+    def pause(self, seconds):
+        """
+        Give no tokens for `seconds` from now.
+        """
+        with self._lock:
+            self.tokens = min(self.tokens, 0)
+            self.last = max(self.last, time.monotonic() + seconds)
+
+
+class Throttle():
+    """
+    Rate limit and AIMD concurrency limit, safe to share between
+    threads.
+
+    Call `acquire()` before, and `release()` with the outcome after
+    each request, or `cancel()` if it was interrupted without outcome
+    (e.g. KeyboardInterrupt, asyncio cancellation).  Use try/finally so
+    that the slot is always freed.
+    """
+
+    def __init__(self, rate=None, burst=None, concurrency=None,
+                 min_concurrency=None, max_concurrency=None,
+                 latency_factor=None):
+        if rate is None:
+            rate = defaultRate
+        self.bucket = TokenBucket(rate, burst or defaultBurst)
+        self.limit = float(concurrency or initialConcurrency)
+        self.minLimit = min_concurrency or minConcurrency
+        self.maxLimit = max_concurrency or maxConcurrency
+        self.latencyFactor = latency_factor or latencyFactor
+        self.inflight = 0
+        self.baseline = {}       # endpoint: (EWMA of latency, count)
+        self.rtt = 0.0
+        self.lastDecrease = 0.0
+        self._cond = threading.Condition()
+
+    def tryAcquire(self):
+        """
+        Take a concurrency slot if free; returns True if taken.
+        """
+        with self._cond:
+            if self.inflight >= int(self.limit):
+                return False
+            self.inflight += 1
+            return True
+
+    def acquire(self):
+        """
+        Wait for a concurrency slot and a token.
+        """
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                self._cond.wait()
+            self.inflight += 1
+        try:
+            wait = self.bucket.reserve()
+            if wait > 0:
+                time.sleep(wait)
+        except BaseException:
+            self.cancel()
+            raise
+
+    async def acquireAsync(self, interval=0.01):
+        """
+        Async version of `acquire()`.
+        """
+        import asyncio
+        while not self.tryAcquire():
+            await asyncio.sleep(interval)
+        try:
+            wait = self.bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self.cancel()
+            raise
+
+    def cancel(self):
+        """
+        Free the slot without adjusting the limit.
+        """
+        with self._cond:
+            self.inflight -= 1
+            self._cond.notify_all()
+
+    def release(self, endpoint, status, latency, retry_after=None):
+        """
+        Free the slot and adjust the limit by the outcome; `status` is
+        the HTTP status or ``'error'``.
+        """
+        overloaded = status == 'error' or status == 429 or status >= 500
+        if not overloaded:
+            overloaded = self.isSlow(endpoint, latency)
+        if retry_after and status in (429, 503):
+            try:
+                self.bucket.pause(float(retry_after))
+            except ValueError:
+                pass
+        with self._cond:
+            self.inflight -= 1
+            self.rtt = latency if self.rtt == 0 else \
+                0.9 * self.rtt + 0.1 * latency
+            now = time.monotonic()
+            if overloaded:
+                if now - self.lastDecrease >= self.rtt:
+                    self.limit = max(self.minLimit, self.limit / 2)
+                    self.lastDecrease = now
+            else:
+                self.limit = min(self.maxLimit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def isSlow(self, endpoint, latency, warmup=10):
+        """
+        Returns True if `latency` is much longer than usual of
+        `endpoint`, after `warmup` samples.
+        """
+        with self._cond:
+            avg, n = self.baseline.get(endpoint, (latency, 0))
+            self.baseline[endpoint] = (0.9 * avg + 0.1 * latency, n + 1)
+        return n >= warmup and latency > self.latencyFactor * avg
+
+
+_throttles = {}
+_lock = threading.Lock()
+
+
+def getThrottle(url):
+    """
+    Returns the shared `Throttle` of host of `url`.
+    """
+    host = urllib.parse.urlsplit(url).netloc
+    with _lock:
+        throttle = _throttles.get(host)
+        if throttle is None:
+            throttle = _throttles[host] = Throttle()
+        return throttle
+
+
+def clear():
+    """
+    Forget all throttles, e.g. after changing settings.
+    """
+    with _lock:
+        _throttles.clear()
@@ -5,9 +5,21 @@ Utility routines for CMIP Citaions.
 
 """
 
+import os
+import re
+import sys
+import glob
 import json
-import certifi
-import urllib3
+import time
+import codecs
+import hashlib
+import threading
+import urllib.parse
+from metrics import metrics
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 __author__ = 'T.Inoue'
 __credits__ = 'Copyright (c) 2019 JAMSTEC'
@@ -16,21 +28,63 @@ __date__ = '2019/12/13'
 
 baseGetUrl = 'https://cera-www.dkrz.de/WDCC/ui/cerasearch/cerarest/exportcmip6'
 basePostUrl = "http://ceracite.dkrz.de:5000/api/v1/citation"
+baseCitationsUrl = ('https://cera-www.dkrz.de/WDCC/ui/cerasearch/'
+                    'cerarest/cmip6Citations')
+
+poolSize = 10
+connectTimeout = 10.0
+readTimeout = 60.0
+
+cacheDir = os.environ.get(
+    'CITATIONUTIL_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'citationutil'))
+cacheTTL = 24 * 3600            # seconds
+cacheMaxBytes = 200 * 1024**2   # bytes
+
+
+def _intern(s):
+    if isinstance(s, str):
+        return sys.intern(s)
+    return s
 
 
 class Creator():
+    """
+    A creator (person) of the record.
+
+    Strings are interned, so the same affiliation or email shared by
+    many creators is stored only once.  Use `CreatorRegistry` to share
+    the identical person across records.
+    """
+    __slots__ = ('givenName', 'familyName', 'email', 'affiliation')
+
     def __init__(self, givenName=None, familyName=None, fullName=None,
                  email=None, affiliation=None):
         if fullName != None:
-            self.fullName = fullName
-            self.givenName, self.familyName = fullName.rsplit(' ',1)
-        else:
-            self.givenName = givenName
-            self.familyName = familyName
-            self.fullName = self.givenName+' '+self.familyName
-        self.creatorName = self.familyName + ', ' + self.givenName
-        self.email = email
-        self.affiliation = affiliation
+            givenName, familyName = fullName.rsplit(' ',1)
+        self.givenName = _intern(givenName)
+        self.familyName = _intern(familyName)
+        self.email = _intern(email)
+        self.affiliation = _intern(affiliation)
+
+    @property
+    def fullName(self):
+        return self.givenName+' '+self.familyName
+
+    @property
+    def creatorName(self):
+        return self.familyName + ', ' + self.givenName
+
+    def key(self):
+        return (self.givenName, self.familyName, self.email, self.affiliation)
+
+    def __eq__(self, other):
+        if not isinstance(other, Creator):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
 
     def __str__(self):
         return f'"{self.creatorName}", "{self.email}", "{self.affiliation}"'
@@ -48,6 +102,413 @@ class Creator():
                }
         return res
 
+
+class CreatorRegistry():
+    """
+    Registry to deduplicate identical creators across records.
+
+    `get()` returns the same `Creator` instance, and `toJSON()` the same
+    dict, for the same person, so that thousands of records listing the
+    same people share one object each.  Returned dicts are shared; do
+    not modify them in place.
+    """
+
+    def __init__(self):
+        self._creators = {}
+        self._json = {}
+
+    def __len__(self):
+        return len(self._creators)
+
+    def get(self, givenName=None, familyName=None, fullName=None,
+            email=None, affiliation=None):
+        if fullName is not None:
+            givenName, familyName = fullName.rsplit(' ',1)
+        key = (givenName, familyName, email, affiliation)
+        c = self._creators.get(key)
+        if c is None:
+            c = self._creators.setdefault(
+                key, Creator(givenName, familyName,
+                             email=email, affiliation=affiliation))
+        return c
+
+    def toJSON(self, creator):
+        key = creator.key()
+        res = self._json.get(key)
+        if res is None:
+            res = self._json.setdefault(key, creator.toJSON())
+        return res
+
+    def internJSON(self, data):
+        """
+        Returns the shared dict for creator dict `data` (as in records).
+        """
+        c = self.get(data['givenName'], data['familyName'],
+                     email=data.get('email'),
+                     affiliation=data.get('affiliation'))
+        res = self.toJSON(c)
+        if res != data:
+            # e.g. creatorName differs from the generated one.
+            return data
+        return res
+
+    def clear(self):
+        self._creators.clear()
+        self._json.clear()
+
+
+creatorRegistry = CreatorRegistry()
+
+
+def readCredentials(host='cera'):
+    """
+    Returns (login, password) for `host` in ``~/.netrc``.
+    """
+    import netrc
+    info = netrc.netrc()
+    login, account, password = info.authenticators(host)
+    return login, password
+
+
+def setServer(server):
+    """
+    Send all requests to `server` (e.g. ``http://localhost:8000``)
+    instead of the citation service, keeping the API paths.
+
+    Used for testing with mockServer.py.  Setting environment variable
+    ``CITATIONUTIL_SERVER`` has the same effect.
+    """
+    global baseGetUrl, basePostUrl, baseCitationsUrl
+
+    def rebase(url):
+        return server.rstrip('/') + urllib.parse.urlsplit(url).path
+
+    baseGetUrl = rebase(baseGetUrl)
+    basePostUrl = rebase(basePostUrl)
+    baseCitationsUrl = rebase(baseCitationsUrl)
+
+
+if os.environ.get('CITATIONUTIL_SERVER'):
+    setServer(os.environ['CITATIONUTIL_SERVER'])
+
+
+class Client():
+    """
+    Reusable HTTP client for the citation service.
+
+    Keeps keep-alive connection pools for `baseGetUrl` and `basePostUrl`
+    (and any other host it is asked to access), so that repeated
+    requests do not pay a new TCP/TLS handshake each time.  Credentials
+    for posting are read from ``~/.netrc`` once and cached, unless given
+    as `auth` (``login:password``).
+
+    A single instance is safe to share between threads.  Requests are
+    paced by the `throttle.Throttle` of each host, unless `throttle` is
+    False.
+
+    urllib3 is imported here, not at module load, so that scripts not
+    accessing the network start quickly.
+    """
+
+    def __init__(self, pool_size=None, connect_timeout=None,
+                 read_timeout=None, retries=2, netrc_host='cera',
+                 auth=None, throttle=True):
+        import certifi
+        import urllib3
+        self.throttle = throttle
+        self.pool_size = pool_size or poolSize
+        self.timeout = urllib3.Timeout(
+            connect=connect_timeout or connectTimeout,
+            read=read_timeout or readTimeout)
+        self.retries = retries
+        self.netrc_host = netrc_host
+        self._auth = None
+        if auth is not None:
+            self._auth = urllib3.util.make_headers(basic_auth=auth)
+        self.http = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=self.pool_size,
+            block=False,
+            timeout=self.timeout,
+            retries=urllib3.Retry(total=self.retries, redirect=2,
+                                  raise_on_status=False),
+            cert_reqs='CERT_REQUIRED',
+            ca_certs=certifi.where())
+
+    def authHeaders(self):
+        """
+        Returns basic-auth headers for posting, read once from netrc.
+        """
+        if self._auth is None:
+            import urllib3
+            login, password = readCredentials(self.netrc_host)
+            self._auth = urllib3.util.make_headers(
+                basic_auth=login+':'+password)
+        return dict(self._auth)
+
+    def get(self, url, fields=None, headers=None, **kw):
+        return self.timed(self.http.request_encode_url, 'GET', url,
+                          fields=fields, headers=headers, **kw)
+
+    def post(self, url, body, headers=None):
+        return self.timed(self.http.request_encode_body, 'POST', url,
+                          headers=headers, body=body)
+
+    def timed(self, func, method, url, **kw):
+        """
+        Call `func` within the throttle of the host, and record the
+        request to `metrics.metrics`.
+        """
+        endpoint = urllib.parse.urlsplit(url).path.rsplit('/', 1)[-1]
+        throttle = None
+        if self.throttle:
+            from throttle import getThrottle
+            throttle = getThrottle(url)
+            throttle.acquire()
+        status = None
+        retry_after = None
+        start = time.perf_counter()
+        try:
+            r = func(method, url, **kw)
+            status = r.status
+            retry_after = r.headers.get('Retry-After')
+        except Exception:
+            status = 'error'
+            metrics.record(endpoint, 'error', time.perf_counter() - start)
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            if throttle is None:
+                pass
+            elif status is None:
+                # interrupted, e.g. by KeyboardInterrupt.
+                throttle.cancel()
+            else:
+                throttle.release(endpoint, status, latency, retry_after)
+        if kw.get('preload_content', True):
+            size = len(r.data)
+        else:
+            size = r.headers.get('Content-Length')
+            size = int(size) if size is not None else None
+        retries = len(r.retries.history) if r.retries is not None else 0
+        metrics.record(endpoint, r.status, latency, size, retries)
+        return r
+
+    def clear(self):
+        """
+        Close all pooled connections.
+        """
+        self.http.clear()
+
+
+_client = None
+_sharedLock = threading.Lock()
+
+
+def getClient():
+    """
+    Returns the shared `Client`, creating it at first use (only once,
+    even if first called from several threads).
+    """
+    global _client
+    if _client is None:
+        with _sharedLock:
+            if _client is None:
+                _client = Client()
+    return _client
+
+
+def setClient(client):
+    """
+    Replace the shared `Client`, e.g. to change pool size or timeouts.
+    """
+    global _client
+    _client = client
+
+
+class ResponseCache():
+    """
+    On-disk cache of `getJSON` responses, keyed by DRS string.
+
+    Each entry is one file `<drs>.json` in `path` holding the record and
+    the validators (ETag/Last-Modified) sent by the server.  Default
+    `path` is a subdirectory of `cacheDir` for each server (see
+    `serverCacheDir()`), so that records from e.g. mockServer.py are
+    never returned for the citation service; entries fetched from other
+    than current `baseGetUrl` are ignored in any case.  Entries
+    younger than `ttl` seconds are used without network access, older
+    ones are revalidated with a conditional request.  The file mtime is
+    the last use time, and least recently used entries are evicted when
+    the total size exceeds `max_bytes`.  The total size is counted once
+    per directory and then kept up to date by `store()`, so the
+    directory is scanned again only when eviction is needed.
+
+    A single instance is safe to share between threads.
+    """
+
+    def __init__(self, path=None, ttl=None, max_bytes=None):
+        self._path = path
+        self.ttl = cacheTTL if ttl is None else ttl
+        self.max_bytes = cacheMaxBytes if max_bytes is None else max_bytes
+        self._totals = {}       # path: total size in bytes
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self._path or serverCacheDir()
+
+    def fname(self, drs):
+        return os.path.join(self.path, drs + '.json')
+
+    def lookup(self, drs):
+        """
+        Returns cached entry for `drs`, or None.
+        """
+        fname = self.fname(drs)
+        try:
+            entry = loadJSON(fname)
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != baseGetUrl:
+            return None
+        try:
+            os.utime(fname)
+        except OSError:
+            pass
+        return entry
+
+    def isFresh(self, entry):
+        return time.time() - entry.get('fetched', 0) < self.ttl
+
+    def validators(self, entry):
+        """
+        Returns headers for a conditional request revalidating `entry`.
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, drs, data, etag=None, last_modified=None):
+        entry = {'drs': drs,
+                 'url': baseGetUrl,
+                 'fetched': time.time(),
+                 'etag': etag,
+                 'last_modified': last_modified,
+                 'data': data}
+        path = self.path
+        os.makedirs(path, exist_ok=True)
+        fname = self.fname(drs)
+        tmpname = f'{fname}.{os.getpid()}.{threading.get_ident()}.tmp'
+        dumpJSON(entry, tmpname, compact=True)
+        size = os.path.getsize(tmpname)
+        with self._lock:
+            if path not in self._totals:
+                self._totals[path] = self.scan(path)[1]
+            try:
+                self._totals[path] -= os.path.getsize(fname)
+            except OSError:
+                pass
+            os.replace(tmpname, fname)
+            self._totals[path] += size
+            over = self._totals[path] > self.max_bytes
+        if over:
+            self.evict()
+        return entry
+
+    def scan(self, path):
+        """
+        Returns list of (mtime, size, filename) of entries in `path`,
+        and their total size.
+        """
+        entries = []
+        total = 0
+        try:
+            it = os.scandir(path)
+        except OSError:
+            return entries, total
+        with it:
+            for e in it:
+                if not e.name.endswith('.json'):
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    # removed by another thread or process.
+                    continue
+                entries.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+        return entries, total
+
+    def evict(self):
+        """
+        Remove least recently used entries until under 90% of
+        `max_bytes`, so that following stores need not evict again soon.
+        """
+        path = self.path
+        limit = 0.9 * self.max_bytes
+        with self._lock:
+            entries, total = self.scan(path)
+            entries.sort()
+            for mtime, size, fname in entries:
+                if total <= limit:
+                    break
+                try:
+                    os.remove(fname)
+                except OSError:
+                    continue
+                total -= size
+            self._totals[path] = total
+
+    def clear(self):
+        path = self.path
+        with self._lock:
+            self._totals.pop(path, None)
+            if not os.path.isdir(path):
+                return
+            for name in os.listdir(path):
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(path, name))
+                    except OSError:
+                        pass
+
+
+def serverCacheDir():
+    """
+    Returns cache directory of responses from current `baseGetUrl`.
+    """
+    host = urllib.parse.urlsplit(baseGetUrl).netloc
+    digest = hashlib.sha1(baseGetUrl.encode('utf-8')).hexdigest()[:12]
+    name = f'responses-{host}-{digest}'.replace(':', '_')
+    return os.path.join(cacheDir, name)
+
+
+_cache = None
+
+
+def getCache():
+    """
+    Returns the shared `ResponseCache`, creating it at first use.
+    """
+    global _cache
+    if _cache is None:
+        with _sharedLock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def setCache(cache):
+    """
+    Replace the shared `ResponseCache`.
+    """
+    global _cache
+    _cache = cache
+
+
 class Experiment():
     def __init__(self, mip, exp, creators):
         self.mip = mip
@@ -62,46 +523,220 @@ class Experiment():
 
 
 
-def getJSON(source_id=None, activity_id=None,
-            institution_id=None, experiment_id=None):
+def getDRS(source_id=None, activity_id=None,
+           institution_id=None, experiment_id=None):
     """
-    Access Citation web cite and get JSON for given CV's.
+    Construct DRS string for given CV's, or None if some is missing.
     """
-
     try:
         drs = '.'.join(['CMIP6', activity_id, institution_id, source_id])
     except:
         return None
-    
+
     if experiment_id is not None:
         drs += '.' + experiment_id
+    return drs
+
+
+def getJSON(source_id=None, activity_id=None,
+            institution_id=None, experiment_id=None, client=None,
+            use_cache=True, refresh=False):
+    """
+    Access Citation web cite and get JSON for given CV's.
+
+    The shared client from `getClient()` is used unless `client` is given.
+
+    Responses are kept in the shared `ResponseCache`; a fresh entry is
+    returned without network access, a stale one is revalidated.  Give
+    `use_cache=False` to bypass the cache entirely, or `refresh=True`
+    to always download and update the cache.
+    """
+
+    drs = getDRS(source_id, activity_id, institution_id, experiment_id)
+    if drs is None:
+        return None
     fields = {'input': drs}
 
-    print('HTTP access with DRS:', drs)
-    http = urllib3.PoolManager(
-        cert_reqs='CERT_REQUIRED',
-        ca_certs=certifi.where())
-    r = http.request_encode_url('GET', baseGetUrl, fields=fields)
+    cache = getCache() if use_cache else None
+    entry = None
+    headers = None
+    if cache is not None and not refresh:
+        entry = cache.lookup(drs)
+        if entry is not None:
+            if cache.isFresh(entry):
+                print('Cached data for DRS:', drs)
+                return entry['data']
+            headers = cache.validators(entry)
 
+    print('HTTP access with DRS:', drs)
+    if client is None:
+        client = getClient()
+    r = client.get(baseGetUrl, fields=fields, headers=headers)
+
+    if (r.status == 304 and entry is not None):
+        cache.store(drs, entry['data'],
+                    etag=entry.get('etag'),
+                    last_modified=entry.get('last_modified'))
+        return entry['data']
     if (r.status != 200):
         print('Bad Status:', r.status)
-        d = eval(r.data.decode('utf-8'))
-        print(d['error'])
+        print(errorMessage(r.data.decode('utf-8')))
         return None
-    jsonData = json.loads(r.data.decode('utf-8'))
+    jsonData = loadsJSON(r.data)
+    if cache is not None:
+        cache.store(drs, jsonData,
+                    etag=r.headers.get('ETag'),
+                    last_modified=r.headers.get('Last-Modified'))
     return jsonData
 
 
+def loadsJSON(s):
+    """
+    Parse JSON `s` (str or bytes), using orjson if available.
+    """
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def dumpsJSON(data, indent=2, compact=False):
+    """
+    Serialize `data` to JSON str.
+
+    Default output is pretty-printed by the json module, byte-identical
+    to ``json.dump(data, f, indent=indent)``, for files edited by hand.
+    With `compact`, output has no whitespace and uses orjson if
+    available, for files read only by programs.
+    """
+    if compact:
+        if orjson is not None:
+            try:
+                return orjson.dumps(data).decode('utf-8')
+            except TypeError:
+                pass
+        return json.dumps(data, separators=(',', ':'))
+    return json.dumps(data, indent=indent)
+
+
 def loadJSON(fname=None):
     """
     Load local JSON file instead of accessing Citation web cite.
     """
 
-    with open(fname) as f:
-        jsonData = json.load(f)
+    with open(fname, 'rb') as f:
+        jsonData = loadsJSON(f.read())
     return jsonData
 
 
+def dumpJSON(data, fname, indent=2, compact=False):
+    """
+    Save `data` to JSON file `fname`, see dumpsJSON() for options.
+    """
+    with open(fname, 'w', encoding='utf-8') as f:
+        f.write(dumpsJSON(data, indent=indent, compact=compact))
+
+
+_ws = re.compile(r'[ \t\n\r]*')
+_numtail = re.compile(r'[0-9eE+\-.]*')
+
+
+def iterJSONArray(chunks):
+    """
+    Parse a JSON array incrementally and yield its elements one by one.
+
+    `chunks` is an iterable of `bytes` (UTF-8) or `str`, such as a
+    streamed HTTP response or blocks read from a file.  Only one element
+    and one unparsed chunk are kept in memory at a time.  Anything but
+    whitespace after the closing ``]`` raises ValueError.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    eof = False
+
+    def more():
+        nonlocal buf, pos, eof
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            eof = True
+            chunk = utf8.decode(b'', final=True)
+        else:
+            if isinstance(chunk, bytes):
+                chunk = utf8.decode(chunk)
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip():
+        nonlocal pos
+        while True:
+            pos = _ws.match(buf, pos).end()
+            if pos < len(buf) or eof:
+                return
+            more()
+
+    def expect(chars):
+        nonlocal pos
+        skip()
+        if pos >= len(buf) or buf[pos] not in chars:
+            raise ValueError(f'expected {chars!r} in JSON array')
+        pos += 1
+        return buf[pos-1]
+
+    def finish():
+        skip()
+        if pos < len(buf):
+            raise ValueError('extra data after JSON array')
+
+    expect('[')
+    skip()
+    if buf[pos:pos+1] == ']':
+        pos += 1
+        finish()
+        return
+    while True:
+        skip()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more()
+                continue
+            if not eof and (
+                    end == len(buf)
+                    or (isinstance(obj, (int, float))
+                        and _numtail.match(buf, end).end() == len(buf))):
+                # a number may continue in the next chunk, e.g. "12" +
+                # "3e" + "5", where "123" is decoded before the "e5".
+                more()
+                continue
+            break
+        pos = end
+        yield obj
+        if expect(',]') == ']':
+            finish()
+            return
+
+
+def expandFiles(names):
+    """
+    Expand directories and glob patterns to a list of JSON files.
+    """
+    files = []
+    for name in names:
+        if os.path.isdir(name):
+            files += sorted(glob.glob(os.path.join(name, '*.json')))
+        elif glob.has_magic(name):
+            files += sorted(glob.glob(name))
+        else:
+            files.append(name)
+    return files
+
+
 def setJSONfname(source_id=None, activity_id=None,
                  institution_id=None, experiment_id=None):
     """
@@ -119,54 +754,93 @@ def setJSONfname(source_id=None, activity_id=None,
     return fname
 
 
-def postJSON(jsonData, extra='check'):
+def postURL(extra='check'):
     """
-    Post JSON to the citaion web.
-
-    Based on "citation_client.py".
-
-    `extra` must be ``test``, ``check``, ``tcheck`` or ``None``.
-
-    Returns response status of request.
-
-    Note that if `extra` is ``check``, response status is other than 200
-    if something is wrong.
+    Returns URL to post with `extra` (see postJSON()).
     """
-    import netrc
-
     url = basePostUrl
     extra_list = ('test', 'check', 'tcheck')
     if (extra is not None) and (extra in extra_list):
         extra_param = '?' + extra + '=1'
         url += extra_param
+    return url
 
-    info = netrc.netrc()
-    login, account, password = info.authenticators("cera")
-    headers = urllib3.util.make_headers(basic_auth=login+':'+password)
+
+def sendJSON(jsonData, extra='check', client=None):
+    """
+    Post JSON to the citaion web without printing anything.
+
+    Arguments are same as `postJSON()`.
+
+    Returns tuple of (status, body) of the response; if the request
+    itself failed, `status` is None and `body` is the exception.
+    """
+
+    url = postURL(extra)
+
+    if client is None:
+        client = getClient()
+    headers = client.authHeaders()
     headers['Content-Type'] = "application/json"
 
-    http = urllib3.PoolManager(
-        cert_reqs='CERT_REQUIRED',
-        ca_certs=certifi.where())
-    encoded_body = json.dumps(jsonData).encode('utf-8')
+    encoded_body = dumpsJSON(jsonData, compact=True).encode('utf-8')
 
     try:
-        r = http.request_encode_body('POST', url,
-                                     headers=headers, body=encoded_body)
+        r = client.post(url, body=encoded_body, headers=headers)
     except Exception as e:
-        print('Error:', e)
-        return e
+        return None, e
 
-#    print(r.status)
-    if (r.status != 200):
-        print('Bad Status:', r.status)
-        print(r.data.decode('utf-8'))
-        d = eval(r.data.decode('utf-8'))
-        print(d['error'])
+    return r.status, r.data.decode('utf-8')
+
+
+def errorMessage(body):
+    """
+    Extract error message from the response body of the citation web.
+    """
+    try:
+        d = json.loads(body)
+    except ValueError:
+        # some errors are returned as Python dict repr.
+        import ast
+        try:
+            d = ast.literal_eval(body)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return body
+    if isinstance(d, dict) and 'error' in d:
+        return d['error']
+    return body
+
+
+def postJSON(jsonData, extra='check', client=None):
+    """
+    Post JSON to the citaion web.
+
+    Based on "citation_client.py".
+
+    `extra` must be ``test``, ``check``, ``tcheck`` or ``None``.
+
+    Returns response status of request.
+
+    Note that if `extra` is ``check``, response status is other than 200
+    if something is wrong.
+
+    The shared client from `getClient()` is used unless `client` is given.
+    """
+
+    status, body = sendJSON(jsonData, extra=extra, client=client)
+    if status is None:
+        print('Error:', body)
+        return body
+
+#    print(status)
+    if (status != 200):
+        print('Bad Status:', status)
+        print(body)
+        print(errorMessage(body))
     else:
-        print(r.data.decode('utf-8'))
+        print(body)
 
-    return r.status
+    return status
 
 
 if __name__ == '__main__':
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8-*-
+"""\
+Validate CMIP6 Citation info JSON files locally.
+
+---
+This script checks the structure of JSON files made by the other
+scripts without accessing the citation service:
+
+- `titles`, `subjects` and `creators` are given,
+- `subjects[0].subject` is a DRS,
+- each creator has the names and email as made by utils.Creator,
+- `relatedIdentifiers` have known types.
+
+Problems of structure are errors, and only files without errors are
+worth checking by postJSON.py.  Identifier or relation types unknown
+to DataCite 4.5 and DOIs of unusual form are only warned, since the
+citation service is the judge of them.
+
+"""
+
+import re
+import time
+import argparse
+from utils import loadJSON, expandFiles
+
+desc, epilog = __doc__.split('---')
+
+# DataCite Metadata Schema 4.5
+relatedIdentifierTypes = frozenset((
+    'ARK', 'arXiv', 'bibcode', 'CSTR', 'DOI', 'EAN13', 'EISSN', 'Handle',
+    'IGSN', 'ISBN', 'ISSN', 'ISTC', 'LISSN', 'LSID', 'PMID', 'PURL',
+    'RRID', 'UPC', 'URL', 'URN', 'w3id'))
+
+relationTypes = frozenset((
+    'IsCitedBy', 'Cites', 'IsSupplementTo', 'IsSupplementedBy',
+    'IsContinuedBy', 'Continues', 'IsDescribedBy', 'Describes',
+    'HasMetadata', 'IsMetadataFor', 'HasVersion', 'IsVersionOf',
+    'IsNewVersionOf', 'IsPreviousVersionOf', 'IsPartOf', 'HasPart',
+    'IsReferencedBy', 'References', 'IsDocumentedBy', 'Documents',
+    'IsCompiledBy', 'Compiles', 'IsVariantFormOf', 'IsOriginalFormOf',
+    'IsIdenticalTo', 'IsReviewedBy', 'Reviews', 'IsDerivedFrom',
+    'IsSourceOf', 'IsRequiredBy', 'Requires', 'IsObsoletedBy',
+    'Obsoletes', 'IsPublishedIn', 'IsCollectedBy', 'Collects',
+    'IsTranslationOf', 'HasTranslation'))
+
+
+class Validator():
+    """
+    Validator of citation records.
+
+    Patterns are compiled once at construction, so that one instance
+    validates thousands of records quickly.
+    """
+
+    def __init__(self):
+        self.drs = re.compile(
+            r'CMIP6\.[A-Za-z0-9-]+\.[A-Za-z0-9-]+\.[A-Za-z0-9-]+'
+            r'(\.[A-Za-z0-9-]+)?')
+        self.email = re.compile(r'[^@\s,]+@[^@\s,]+\.[^@\s,]+')
+        self.doi = re.compile(
+            r'(doi:|https?://(dx\.)?doi\.org/)?10\.\d{4,9}/\S+',
+            re.IGNORECASE)
+
+    def validate(self, data):
+        """
+        Returns list of error messages, empty if `data` is valid.
+        """
+        return self.check(data)[0]
+
+    def check(self, data):
+        """
+        Returns tuple of lists of (error, warning) messages.
+        """
+        if not isinstance(data, dict):
+            return ['record is not a JSON object'], []
+        errors = []
+        warnings = []
+
+        titles = data.get('titles')
+        if not titles or not isinstance(titles, list):
+            errors.append('titles: missing or empty')
+        elif not all(isinstance(t, str) and t.strip() for t in titles):
+            errors.append('titles: empty title')
+
+        subjects = data.get('subjects')
+        if not subjects or not isinstance(subjects, list):
+            errors.append('subjects: missing or empty')
+        else:
+            subject = subjects[0].get('subject') \
+                if isinstance(subjects[0], dict) else None
+            if not isinstance(subject, str) \
+               or not self.drs.fullmatch(subject):
+                errors.append(f'subjects[0].subject: invalid DRS {subject!r}')
+
+        creators = data.get('creators')
+        if not creators or not isinstance(creators, list):
+            errors.append('creators: missing or empty')
+        else:
+            for i, c in enumerate(creators):
+                errors += self.validateCreator(c, f'creators[{i}]')
+
+        related = data.get('relatedIdentifiers', [])
+        if not isinstance(related, list):
+            errors.append('relatedIdentifiers: not a list')
+        else:
+            for i, r in enumerate(related):
+                e, w = self.validateRelated(r, f'relatedIdentifiers[{i}]')
+                errors += e
+                warnings += w
+
+        return errors, warnings
+
+    def validateCreator(self, c, where):
+        if not isinstance(c, dict):
+            return [f'{where}: not a JSON object']
+        errors = []
+        given = c.get('givenName')
+        family = c.get('familyName')
+        name = c.get('creatorName')
+        if not isinstance(name, str) or not name.strip():
+            errors.append(f'{where}.creatorName: missing')
+        elif isinstance(given, str) and isinstance(family, str) \
+                and name != family + ', ' + given:
+            errors.append(f'{where}.creatorName: {name!r} is not '
+                          f'"familyName, givenName"')
+        email = c.get('email')
+        if email and not (isinstance(email, str)
+                          and self.email.fullmatch(email)):
+            errors.append(f'{where}.email: invalid {email!r}')
+        aff = c.get('affiliation')
+        if aff is not None and not isinstance(aff, str):
+            errors.append(f'{where}.affiliation: not a string')
+        return errors
+
+    def validateRelated(self, r, where):
+        """
+        Returns tuple of lists of (error, warning) messages.
+        """
+        if not isinstance(r, dict):
+            return [f'{where}: not a JSON object'], []
+        errors = []
+        warnings = []
+        ident = r.get('relatedIdentifier')
+        itype = r.get('relatedIdentifierType')
+        rtype = r.get('relationType')
+        if not isinstance(ident, str) or not ident:
+            errors.append(f'{where}.relatedIdentifier: missing')
+        if not isinstance(itype, str) or not itype:
+            errors.append(f'{where}.relatedIdentifierType: missing')
+        elif itype not in relatedIdentifierTypes:
+            warnings.append(f'{where}.relatedIdentifierType: '
+                            f'unknown {itype!r}')
+        elif itype == 'DOI' and isinstance(ident, str) \
+                and not self.doi.fullmatch(ident):
+            warnings.append(f'{where}.relatedIdentifier: '
+                            f'unusual DOI {ident!r}')
+        if not isinstance(rtype, str) or not rtype:
+            errors.append(f'{where}.relationType: missing')
+        elif rtype not in relationTypes:
+            warnings.append(f'{where}.relationType: unknown {rtype!r}')
+        return errors, warnings
+
+
+validator = Validator()
+
+
+def validateRecord(data):
+    """
+    Validate `data` with the shared `Validator`.
+
+    Returns list of error messages, empty if valid.
+    """
+    return validator.validate(data)
+
+
+def checkRecord(data):
+    """
+    Validate `data` with the shared `Validator`.
+
+    Returns tuple of lists of (error, warning) messages.
+    """
+    return validator.check(data)
+
+
+def my_parser():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=desc, epilog=epilog, )
+    parser.add_argument('-v', '--verbose',
+                        dest='verbose', action='store_true',
+                        help='be verbose.',
+                        default=False)
+    parser.add_argument('jsonfile',
+                        type=str, nargs='+',
+                        help='filename, directory or glob pattern')
+    return parser
+
+
+def main(argv=None):
+    parser = my_parser()
+    a = parser.parse_args(argv)
+
+    files = expandFiles(a.jsonfile)
+
+    start = time.time()
+    nfailed = 0
+    for fname in files:
+        try:
+            errors, warnings = checkRecord(loadJSON(fname))
+        except Exception as e:
+            errors, warnings = [str(e)], []
+        if errors:
+            nfailed += 1
+            print(f'{fname}: NG')
+        elif warnings or a.verbose:
+            print(f'{fname}: OK')
+        for e in errors:
+            print(f'  {e}')
+        for w in warnings:
+            print(f'  warning: {w}')
+
+    print(f'{len(files)} files, {nfailed} failed '
+          f'({time.time() - start:.2f} s).')
+    return 1 if nfailed else 0
+
+
+if __name__ == '__main__':
+    exit(main())